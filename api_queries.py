@@ -0,0 +1,278 @@
+import json
+import base64
+from datetime import date
+from sqlalchemy import text
+
+# SQL behind the API's DB-bound endpoints, kept apart from backend.py so
+# check_query_plans.py can EXPLAIN exactly what the endpoints run without
+# importing the app (engines, caches, background refreshers).
+
+NGX_SQL_COLUMNS = """
+            ticker AS Ticker,
+            open_price AS Open,
+            close_price AS Close,
+            change_pct AS Change_pct,
+            volume AS Volume,
+            value_traded AS Value_traded,
+            trades AS Trades,
+            trade_date AS Trade_Date
+"""
+
+
+BRVM_SQL_COLUMNS = """
+            ticker AS Ticker,
+            name AS Name,
+            volume AS Volume,
+            prev_close AS Prev_Close,
+            open_price AS Open,
+            close_price AS Close,
+            change_pct AS Change_pct,
+            trade_date AS Trade_Date
+"""
+
+
+def encode_cursor(trade_date, ticker):
+    raw = json.dumps([str(trade_date), ticker]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    trade_date, ticker = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    return date.fromisoformat(trade_date), ticker
+
+
+def latest_day_query(table):
+    return text(f"SELECT MAX(trade_date) FROM {table};")
+
+
+def staging_query(table, columns, day=None, start=None, end=None, ticker=None, limit=500, cursor=None):
+    # Keyset pagination over (trade_date DESC, ticker ASC); fetches one row
+    # more than limit to tell whether there is a next page.
+    filters = []
+    params = {"limit": limit + 1}
+
+    if day is not None:
+        filters.append("trade_date = :day")
+        params["day"] = day
+    if start is not None:
+        filters.append("trade_date >= :start")
+        params["start"] = start
+    if end is not None:
+        filters.append("trade_date <= :end")
+        params["end"] = end
+    if ticker:
+        filters.append("ticker = :ticker")
+        params["ticker"] = ticker.upper()
+    if cursor:
+        cursor_date, cursor_ticker = decode_cursor(cursor)
+        filters.append("(trade_date < :cursor_date OR (trade_date = :cursor_date AND ticker > :cursor_ticker))")
+        params["cursor_date"] = cursor_date
+        params["cursor_ticker"] = cursor_ticker
+
+    query = text(f"""
+        SELECT
+            {columns}
+        FROM {table}
+        {"WHERE " + " AND ".join(filters) if filters else ""}
+        ORDER BY trade_date DESC, ticker ASC
+        LIMIT :limit
+    """)
+    return query, params
+
+
+EXPORT_COLUMNS = [
+    "exchange_id", "ticker", "company_name", "trade_date",
+    "open_price", "high_price", "low_price", "close_price", "prev_close",
+    "change_pct", "volume", "value_traded", "trades",
+    "currency", "used_ex_rate", "price_in_usd", "value_traded_usd",
+]
+
+
+def market_export_query(exchange_id=None, start=None, end=None, ticker=None):
+    filters = []
+    params = {}
+    if exchange_id is not None:
+        filters.append("exchange_id = :exchange_id")
+        params["exchange_id"] = exchange_id
+    if start is not None:
+        filters.append("trade_date >= :start")
+        params["start"] = start
+    if end is not None:
+        filters.append("trade_date <= :end")
+        params["end"] = end
+    if ticker:
+        filters.append("ticker = :ticker")
+        params["ticker"] = ticker.upper()
+
+    query = text(f"""
+        SELECT {", ".join(EXPORT_COLUMNS)}
+        FROM market_data_daily
+        {"WHERE " + " AND ".join(filters) if filters else ""}
+        ORDER BY trade_date, exchange_id, ticker
+    """)
+    return query, params
+
+
+FOOD_PRICES_EXPORT_QUERY = text("""
+    SELECT
+        f.week_start,
+        f.week_end,
+        f.city_id,
+        c.city_name,
+        f.product_id,
+        p.product_name,
+        f.price,
+        f.variation
+    FROM Benin_inflation.food_prices f
+    JOIN Benin_inflation.cities c ON f.city_id = c.city_id
+    JOIN Benin_inflation.products p ON f.product_id = p.product_id
+    ORDER BY f.week_start, f.city_id, f.product_id
+""")
+
+
+STOCK_COLUMNS = """
+            exchange_id,
+            ticker,
+            company_name,
+            trade_date,
+            open_price,
+            high_price,
+            low_price,
+            close_price,
+            price_in_usd,
+            change_pct,
+            volume,
+            value_traded,
+            value_traded_usd,
+            currency
+"""
+
+
+def stock_query(ticker, start=None, end=None, limit=None):
+    filters = ["ticker = :ticker"]
+    params = {"ticker": ticker}
+    if start is not None:
+        filters.append("trade_date >= :start")
+        params["start"] = start
+    if end is not None:
+        filters.append("trade_date <= :end")
+        params["end"] = end
+    if limit is not None:
+        params["limit"] = limit
+
+    query = text(f"""
+        SELECT
+            {STOCK_COLUMNS}
+        FROM market_data_daily
+        WHERE {" AND ".join(filters)}
+        ORDER BY trade_date DESC
+        {"LIMIT :limit" if limit is not None else ""}
+    """)
+    return query, params
+
+
+ECONOMY_SUMMARY_QUERY = text("""
+    SELECT
+        MIN(week_start) AS first_week,
+        MAX(week_start) AS latest_week,
+        COUNT(*) AS total_rows,
+        COUNT(DISTINCT city_id) AS total_cities,
+        COUNT(DISTINCT product_id) AS total_products
+    FROM Benin_inflation.food_prices;
+""")
+
+
+ECONOMY_LATEST_PRICES_QUERY = text("""
+    SELECT
+        f.week_start,
+        f.week_end,
+        c.city_name,
+        p.product_name,
+        f.price,
+        f.variation
+    FROM Benin_inflation.food_prices f
+    JOIN Benin_inflation.cities c ON f.city_id = c.city_id
+    JOIN Benin_inflation.products p ON f.product_id = p.product_id
+    WHERE f.week_start = (
+        SELECT MAX(week_start)
+        FROM Benin_inflation.food_prices
+    )
+    ORDER BY c.city_name, p.product_name;
+""")
+
+
+ECONOMY_TOP_INCREASES_QUERY = text("""
+    SELECT
+        f.week_start,
+        c.city_name,
+        p.product_name,
+        f.price,
+        f.variation
+    FROM Benin_inflation.food_prices f
+    JOIN Benin_inflation.cities c ON f.city_id = c.city_id
+    JOIN Benin_inflation.products p ON f.product_id = p.product_id
+    WHERE f.week_start = (
+        SELECT MAX(week_start)
+        FROM Benin_inflation.food_prices
+    )
+    ORDER BY f.variation DESC
+    LIMIT 20;
+""")
+
+
+ECONOMY_CITIES_QUERY = text("""
+    SELECT city_name
+    FROM Benin_inflation.cities
+    ORDER BY city_name;
+""")
+
+
+ECONOMY_PRODUCTS_QUERY = text("""
+    SELECT product_name
+    FROM Benin_inflation.products
+    ORDER BY product_name;
+""")
+
+
+ECONOMY_PRICE_HISTORY_QUERY = text("""
+    SELECT
+        f.week_start,
+        f.price,
+        f.variation
+    FROM Benin_inflation.food_prices f
+    JOIN Benin_inflation.cities c ON f.city_id = c.city_id
+    JOIN Benin_inflation.products p ON f.product_id = p.product_id
+    WHERE c.city_name = :city
+      AND p.product_name = :product
+    ORDER BY f.week_start;
+""")
+
+
+ECONOMY_PRICE_STATS_QUERY = text("""
+    SELECT
+        MIN(f.week_start) AS first_week,
+        MAX(f.week_start) AS latest_week,
+        MIN(f.price) AS lowest_price,
+        MAX(f.price) AS highest_price,
+        AVG(f.price) AS average_price
+    FROM Benin_inflation.food_prices f
+    JOIN Benin_inflation.cities c ON f.city_id = c.city_id
+    JOIN Benin_inflation.products p ON f.product_id = p.product_id
+    WHERE c.city_name = :city
+      AND p.product_name = :product;
+""")
+
+
+ECONOMY_LATEST_PRICE_QUERY = text("""
+    SELECT
+        f.week_start,
+        f.price,
+        f.variation
+    FROM Benin_inflation.food_prices f
+    JOIN Benin_inflation.cities c ON f.city_id = c.city_id
+    JOIN Benin_inflation.products p ON f.product_id = p.product_id
+    WHERE c.city_name = :city
+      AND p.product_name = :product
+    ORDER BY f.week_start DESC
+    LIMIT 1;
+""")
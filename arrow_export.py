@@ -0,0 +1,108 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Typed, columnar bulk downloads built straight from DB cursor batches.
+# Each batch of rows becomes one Arrow record batch (and one Parquet row
+# group), so the full table never has to be held in memory.
+
+MARKET_SCHEMA = pa.schema([
+    ("exchange_id", pa.int32()),
+    ("ticker", pa.string()),
+    ("company_name", pa.string()),
+    ("trade_date", pa.date32()),
+    ("open_price", pa.float64()),
+    ("high_price", pa.float64()),
+    ("low_price", pa.float64()),
+    ("close_price", pa.float64()),
+    ("prev_close", pa.float64()),
+    ("change_pct", pa.float64()),
+    ("volume", pa.int64()),
+    ("value_traded", pa.float64()),
+    ("trades", pa.int64()),
+    ("currency", pa.string()),
+    ("used_ex_rate", pa.float64()),
+    ("price_in_usd", pa.float64()),
+    ("value_traded_usd", pa.float64()),
+])
+
+FOOD_PRICES_SCHEMA = pa.schema([
+    ("week_start", pa.date32()),
+    ("week_end", pa.date32()),
+    ("city_id", pa.int32()),
+    ("city_name", pa.string()),
+    ("product_id", pa.int32()),
+    ("product_name", pa.string()),
+    ("price", pa.float64()),
+    ("variation", pa.float64()),
+])
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+
+def _column(values, field):
+    try:
+        return pa.array(values, type=field.type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+        # DECIMAL columns come back as Decimal objects; let Arrow infer
+        # decimal128 and cast from there.
+        return pa.array(values).cast(field.type, safe=False)
+
+
+def record_batch(rows, schema):
+    columns = list(zip(*rows)) if rows else [[] for _ in schema]
+    return pa.RecordBatch.from_arrays(
+        [_column(list(values), field) for values, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+class _ChunkSink:
+    # Write-only file object handing finished bytes back to the generator.
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def arrow_stream(batches, schema):
+    sink = _ChunkSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        yield sink.drain()
+        for rows in batches:
+            writer.write_batch(record_batch(rows, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def parquet_stream(batches, schema):
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in batches:
+            writer.write_batch(record_batch(rows, schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
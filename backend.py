@@ -1,19 +1,116 @@
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import HTMLResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import requests
 import pandas as pd
-import numpy as np
 from bs4 import BeautifulSoup
 import os
-from sqlalchemy import create_engine, text
+import io
+import csv
+import threading
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import create_async_engine
 from dotenv import load_dotenv
-import yfinance as yf
+from datetime import date
+from market_snapshot import LatestSnapshot
+from response_cache import ResponseCache, SingleFlight
+from fx_store import FX_CURRENCIES, FXRateStore
+from ngx_fetch import fetch_ngx_equities, normalize_ngx
+from stock_series import (
+    INTERVALS as STOCK_INTERVALS,
+    resample,
+    downsample,
+    analytics,
+    history_arrays,
+)
+from ticker_store import TickerStore
+from api_queries import (
+    NGX_SQL_COLUMNS,
+    BRVM_SQL_COLUMNS,
+    EXPORT_COLUMNS,
+    FOOD_PRICES_EXPORT_QUERY,
+    ECONOMY_SUMMARY_QUERY,
+    ECONOMY_LATEST_PRICES_QUERY,
+    ECONOMY_TOP_INCREASES_QUERY,
+    ECONOMY_CITIES_QUERY,
+    ECONOMY_PRODUCTS_QUERY,
+    ECONOMY_PRICE_HISTORY_QUERY,
+    ECONOMY_PRICE_STATS_QUERY,
+    ECONOMY_LATEST_PRICE_QUERY,
+    latest_day_query,
+    staging_query,
+    stock_query,
+    market_export_query,
+    encode_cursor,
+)
+from fast_json import FastJSONResponse, dumps, json_result, rows_to_records, frame_to_records, clean_records
+from arrow_export import (
+    MARKET_SCHEMA,
+    FOOD_PRICES_SCHEMA,
+    ARROW_MEDIA_TYPE,
+    PARQUET_MEDIA_TYPE,
+    arrow_stream,
+    parquet_stream,
+)
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 load_dotenv()
 engine = create_engine(os.getenv("DATABASE_URL"))
 
+
+def async_database_url(url):
+    # Same database through the asyncio driver, e.g. mysql+pymysql:// -> mysql+aiomysql://
+    url = make_url(url)
+    if url.get_backend_name() == "mysql":
+        url = url.set(drivername="mysql+aiomysql")
+    return url
+
+
+# DB-bound endpoints await their queries on the event loop instead of each
+# holding a threadpool worker; loaders, exports and refreshers stay on `engine`.
+async_engine = create_async_engine(
+    os.getenv("ASYNC_DATABASE_URL") or async_database_url(os.getenv("DATABASE_URL")),
+    pool_size=int(os.getenv("DB_POOL_SIZE", "20")),
+    max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+    pool_recycle=3600
+)
+
+
+async def fetch_records(query, params=None, missing="-"):
+    async with async_engine.connect() as conn:
+        return rows_to_records(await conn.execute(query, params or {}), missing)
+
+# Latest session per exchange, held as NumPy columns for the ranking endpoints
+market_snapshot = LatestSnapshot(engine)
+
+# Per-ticker history as memory-mapped NumPy files written by the loaders
+ticker_store = TickerStore()
+
+# Read-only responses; loaders invalidate namespaces through data_versions
+response_cache = ResponseCache(engine, max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "512")))
+
+# Live NGX proxy: one upstream call per TTL however many clients are polling
+ngx_live = SingleFlight(
+    ttl=int(os.getenv("NGX_LIVE_TTL", "30")),
+    max_stale=int(os.getenv("NGX_LIVE_MAX_STALE", "86400"))
+)
+
+# FX rates are refreshed in the background and served from memory
+fx_rate_store = FXRateStore(
+    engine,
+    refresh_interval=int(os.getenv("FX_REFRESH_SECONDS", "3600")),
+    backfill_period=os.getenv("FX_BACKFILL_PERIOD", "5y")
+)
+
+
+@app.on_event("startup")
+def start_background_refreshers():
+    fx_rate_store.start()
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    await async_engine.dispose()
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -21,6 +118,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Cache", "Age"],
 )
 
 # ROOT
@@ -28,93 +126,114 @@ app.add_middleware(
 def root():
     return {"message": "Welcome to the real-time NGX 📈 and BRVM 📊 API"}
 
+# =========================
+# Response cache admin
+# =========================
+@app.get("/api/cache/stats")
+@json_result
+def cache_stats():
+    return response_cache.stats()
+
+@app.post("/api/cache/invalidate")
+@json_result
+def cache_invalidate(namespace: str = None, x_cache_token: str = Header(None)):
+    # Disabled unless CACHE_ADMIN_TOKEN is set
+    token = os.getenv("CACHE_ADMIN_TOKEN")
+    if not token or x_cache_token != token:
+        raise HTTPException(status_code=403, detail="Invalid cache token")
+    namespaces = [namespace] if namespace else []
+    return {"invalidated": namespaces or "all", "entries_dropped": response_cache.invalidate(*namespaces)}
+
+
+@response_cache.cached("market", ttl=300)
+async def staging_page(table, columns, day=None, start=None, end=None, ticker=None, limit=500, cursor=None):
+    # With no filters only the latest session is returned, so responses stay
+    # flat as history grows.
+    if day is None and start is None and end is None and ticker is None:
+        async with async_engine.connect() as conn:
+            day = (await conn.execute(latest_day_query(table))).scalar()
+
+    query, params = staging_query(table, columns, day, start, end, ticker, limit, cursor)
+    records = await fetch_records(query, params)
+
+    next_cursor = None
+    if len(records) > limit:
+        records = records[:limit]
+        next_cursor = encode_cursor(records[-1]["Trade_Date"], records[-1]["Ticker"])
+
+    return records, next_cursor
+
+
+async def staging_endpoint(table, columns, day, start, end, ticker, limit, cursor):
+    records, next_cursor = await staging_page(
+        table, columns,
+        day=day, start=start, end=end, ticker=ticker,
+        limit=max(1, min(limit, 5000)),
+        cursor=cursor
+    )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(records, headers=headers)
+
+
 # =========================
 # ✅ NGX API (uses OpeningPrice for % change)
 # =========================
 @app.get("/api/ngx-sql")
-def get_ngx_sql_data():
+@json_result
+async def get_ngx_sql_data(
+    day: date = Query(None, alias="date"),
+    start: date = Query(None, alias="from"),
+    end: date = Query(None, alias="to"),
+    ticker: str = None,
+    limit: int = 500,
+    cursor: str = None
+):
     try:
-        query = """
-        SELECT
-            ticker AS Ticker,
-            open_price AS Open,
-            close_price AS Close,
-            change_pct AS Change_pct,
-            volume AS Volume,
-            value_traded AS Value_traded,
-            trades AS Trades,
-            trade_date AS Trade_Date
-        FROM ngx_daily
-        ORDER BY trade_date DESC, ticker ASC
-        """
-
-        df = pd.read_sql(query, con=engine)
+        return await staging_endpoint("ngx_daily", NGX_SQL_COLUMNS, day, start, end, ticker, limit, cursor)
 
-        df["Trade_Date"] = pd.to_datetime(df["Trade_Date"]).dt.strftime("%Y-%m-%d")
+    except Exception as e:
+        return {"error": "NGX SQL API failed", "details": str(e)}
 
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
+def load_ngx_live():
+    df = normalize_ngx(fetch_ngx_equities())
+
+    df = df.rename(columns={
+        "Symbol": "Ticker",
+        "OpeningPrice": "Open",
+        "HighPrice": "High",
+        "LowPrice": "Low",
+        "ClosePrice": "Close",
+        "Change": "Change_value",
+        "ChangePct": "Change_pct",
+        "Value": "Value_traded",
+        "TradeDate": "Trade_Date"
+    })
+
+    df["Trade_Date"] = pd.to_datetime(df["Trade_Date"]).dt.strftime("%Y-%m-%d")
+
+    return frame_to_records(df[
+        [
+            "Ticker",
+            "Open",
+            "High",
+            "Low",
+            "Close",
+            "Change_value",
+            "Change_pct",
+            "Volume",
+            "Value_traded",
+            "Trades",
+            "Trade_Date"
+        ]
+    ], missing=None)
 
-        return df.to_dict(orient="records")
 
-    except Exception as e:
-        return {"error": "NGX SQL API failed", "details": str(e)}
 @app.get("/api/ngx")
+@json_result
 def get_ngx_data():
-    url = "https://doclib.ngxgroup.com/REST/api/statistics/equities/?market=&sector=&orderby=&pageSize=300&pageNo=0"
     try:
-        r = requests.get(url, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        df = pd.DataFrame(data)
-
-        expected = [
-            "Symbol", "OpeningPrice", "HighPrice", "LowPrice", "ClosePrice",
-            "Change", "Volume", "Value", "Trades", "TradeDate"
-        ]
-
-        for col in expected:
-            if col not in df.columns:
-                df[col] = np.nan
-
-        change = pd.to_numeric(df["Change"], errors="coerce")
-        opening = pd.to_numeric(df["OpeningPrice"], errors="coerce")
-
-        with np.errstate(divide="ignore", invalid="ignore"):
-            pct = (change / opening) * 100
-
-        df["ChangePct"] = np.where(np.isfinite(pct), np.round(pct, 2), np.nan)
-
-        df = df.replace({np.nan: None, np.inf: None, -np.inf: None})
-
-        df = df.rename(columns={
-            "Symbol": "Ticker",
-            "OpeningPrice": "Open",
-            "HighPrice": "High",
-            "LowPrice": "Low",
-            "ClosePrice": "Close",
-            "Change": "Change_value",
-            "ChangePct": "Change_pct",
-            "Value": "Value_traded",
-            "TradeDate": "Trade_Date"
-        })
-
-        df["Trade_Date"] = pd.to_datetime(df["Trade_Date"]).dt.strftime("%Y-%m-%d")
-
-        return df[
-            [
-                "Ticker",
-                "Open",
-                "High",
-                "Low",
-                "Close",
-                "Change_value",
-                "Change_pct",
-                "Volume",
-                "Value_traded",
-                "Trades",
-                "Trade_Date"
-            ]
-        ].to_dict(orient="records")
+        data, age, status = ngx_live.get(load_ngx_live)
+        return FastJSONResponse(data, headers={"Age": str(int(age)), "X-Cache": status})
 
     except Exception as e:
         return {"error": "Something went wrong", "details": str(e)}
@@ -266,17 +385,50 @@ def frontend_page():
     """
 
 # ---------- BRVM API (Excel) ----------
-@app.get("/api/brvm")
-def get_brvm_data():
+BRVM_ACTIONS_PATH = os.path.join("static", "brvm_actions.xlsx")
+BRVM_ACTIONS_PARQUET = os.path.splitext(BRVM_ACTIONS_PATH)[0] + ".parquet"
+
+brvm_actions_lock = threading.Lock()
+brvm_actions_cache = {"mtime": None, "records": None}
+
+
+def read_brvm_actions(mtime):
+    # Parsing the xlsx through openpyxl is slow, so a Parquet copy is written
+    # next to it and reused on cold starts until the xlsx changes again.
+    if os.path.exists(BRVM_ACTIONS_PARQUET) and os.path.getmtime(BRVM_ACTIONS_PARQUET) >= mtime:
+        try:
+            return pd.read_parquet(BRVM_ACTIONS_PARQUET)
+        except Exception:
+            pass
+
+    df = pd.read_excel(BRVM_ACTIONS_PATH)
     try:
-        path = os.path.join("static", "brvm_actions.xlsx")
-        df = pd.read_excel(path)
+        df.to_parquet(BRVM_ACTIONS_PARQUET, index=False)
+    except Exception as e:
+        print(f"Could not write {BRVM_ACTIONS_PARQUET}: {e}")
+    return df
+
 
-        df["Trade_Date"] = pd.to_datetime(df["Trade_Date"]).dt.strftime("%Y-%m-%d")
+def load_brvm_actions():
+    mtime = os.path.getmtime(BRVM_ACTIONS_PATH)
 
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
+    with brvm_actions_lock:
+        if brvm_actions_cache["mtime"] != mtime:
+            df = read_brvm_actions(mtime)
 
-        return df.to_dict(orient="records")
+            df["Trade_Date"] = pd.to_datetime(df["Trade_Date"]).dt.strftime("%Y-%m-%d")
+
+            brvm_actions_cache["records"] = frame_to_records(df)
+            brvm_actions_cache["mtime"] = mtime
+
+        return brvm_actions_cache["records"]
+
+
+@app.get("/api/brvm")
+@json_result
+def get_brvm_data():
+    try:
+        return load_brvm_actions()
 
     except Exception as e:
         return {"error": "BRVM API failed", "details": str(e)}
@@ -284,29 +436,17 @@ def get_brvm_data():
 
 # ---------- BRVM SQL API ----------
 @app.get("/api/brvm-sql")
-def get_brvm_sql_data():
+@json_result
+async def get_brvm_sql_data(
+    day: date = Query(None, alias="date"),
+    start: date = Query(None, alias="from"),
+    end: date = Query(None, alias="to"),
+    ticker: str = None,
+    limit: int = 500,
+    cursor: str = None
+):
     try:
-        query = """
-        SELECT
-            ticker AS Ticker,
-            name AS Name,
-            volume AS Volume,
-            prev_close AS Prev_Close,
-            open_price AS Open,
-            close_price AS Close,
-            change_pct AS Change_pct,
-            trade_date AS Trade_Date
-        FROM brvm_daily
-        ORDER BY trade_date DESC, ticker ASC
-        """
-
-        df = pd.read_sql(query, con=engine)
-
-        df["Trade_Date"] = pd.to_datetime(df["Trade_Date"]).dt.strftime("%Y-%m-%d")
-
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
-
-        return df.to_dict(orient="records")
+        return await staging_endpoint("brvm_daily", BRVM_SQL_COLUMNS, day, start, end, ticker, limit, cursor)
 
     except Exception as e:
         return {"error": "BRVM SQL API failed", "details": str(e)}
@@ -418,111 +558,28 @@ def frontend_brvm():
     """
 
 @app.get("/api/market/latest")
+@json_result
 def get_market_latest():
     try:
-        query = """
-        SELECT
-            m.exchange_id,
-            e.region,
-            m.ticker,
-            m.company_name,
-            m.trade_date,
-            m.open_price,
-            m.close_price,
-            m.price_in_usd,
-            m.change_pct,
-            m.volume,
-            m.value_traded,
-            m.value_traded_usd,
-            m.currency
-        FROM market_data_daily m
-        LEFT JOIN exchanges e ON m.exchange_id = e.exchange_id
-        INNER JOIN (
-            SELECT exchange_id, MAX(trade_date) AS latest_date
-            FROM market_data_daily
-            GROUP BY exchange_id
-        ) latest
-            ON m.exchange_id = latest.exchange_id
-            AND m.trade_date = latest.latest_date
-        ORDER BY m.exchange_id, m.ticker;
-        """
-        df = pd.read_sql(query, con=engine)
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
-        return df.to_dict(orient="records")
+        return market_snapshot.latest()
     except Exception as e:
         return {"error": "Market latest API failed", "details": str(e)}
 
 
 @app.get("/api/market/top-gainers")
-def get_market_top_gainers():
+@json_result
+def get_market_top_gainers(limit: int = 20):
     try:
-        query = """
-        SELECT
-            m.exchange_id,
-            e.region,
-            m.ticker,
-            m.company_name,
-            m.trade_date,
-            m.close_price,
-            m.price_in_usd,
-            m.change_pct,
-            m.volume,
-            m.value_traded,
-            m.value_traded_usd,
-            m.currency
-        FROM market_data_daily m
-        LEFT JOIN exchanges e ON m.exchange_id = e.exchange_id
-        INNER JOIN (
-            SELECT exchange_id, MAX(trade_date) AS latest_date
-            FROM market_data_daily
-            GROUP BY exchange_id
-        ) latest
-            ON m.exchange_id = latest.exchange_id
-            AND m.trade_date = latest.latest_date
-        WHERE m.change_pct IS NOT NULL
-        ORDER BY m.change_pct DESC
-        LIMIT 20;
-        """
-        df = pd.read_sql(query, con=engine)
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
-        return df.to_dict(orient="records")
+        return market_snapshot.top("change_pct", limit=limit)
     except Exception as e:
         return {"error": "Top gainers API failed", "details": str(e)}
 
 
 @app.get("/api/market/top-volume")
-def get_market_top_volume():
+@json_result
+def get_market_top_volume(limit: int = 20):
     try:
-        query = """
-        SELECT
-            m.exchange_id,
-            e.region,
-            m.ticker,
-            m.company_name,
-            m.trade_date,
-            m.close_price,
-            m.price_in_usd,
-            m.change_pct,
-            m.volume,
-            m.value_traded,
-            m.value_traded_usd,
-            m.currency
-        FROM market_data_daily m
-        LEFT JOIN exchanges e ON m.exchange_id = e.exchange_id
-        INNER JOIN (
-            SELECT exchange_id, MAX(trade_date) AS latest_date
-            FROM market_data_daily
-            GROUP BY exchange_id
-        ) latest
-            ON m.exchange_id = latest.exchange_id
-            AND m.trade_date = latest.latest_date
-        WHERE m.volume IS NOT NULL
-        ORDER BY m.volume DESC
-        LIMIT 20;
-        """
-        df = pd.read_sql(query, con=engine)
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
-        return df.to_dict(orient="records")
+        return market_snapshot.top("volume", limit=limit)
     except Exception as e:
         return {"error": "Top volume API failed", "details": str(e)}
 
@@ -693,13 +750,13 @@ def market_dashboard():
                 document.querySelectorAll(".tab").forEach(b => b.classList.remove("active"));
                 if (btn) btn.classList.add("active");
 
-                const base = exchangeId === 0 ? "/api/market" : `/api/market/${exchangeId}`;
+                const dashboard = await getJSON(`/api/market/${exchangeId}/dashboard`);
 
-                const gainers = await getJSON(`${base}/top-gainers`);
-                const losers = exchangeId === 0 ? [] : await getJSON(`${base}/top-losers`);
-                const volume = await getJSON(`${base}/top-volume`);
-                const value = exchangeId === 0 ? [] : await getJSON(`${base}/top-value`);
-                const latest = await getJSON(`${base}/latest`);
+                const gainers = dashboard.gainers ?? [];
+                const losers = dashboard.losers ?? [];
+                const volume = dashboard.volume ?? [];
+                const value = dashboard.value ?? [];
+                const latest = dashboard.latest ?? [];
 
                 makeChart("gainersChart", gainers.slice(0,5).map(r=>r.ticker), gainers.slice(0,5).map(r=>Number(r.change_pct)), "Change %", "#22c55e");
 
@@ -806,208 +863,237 @@ def market_dashboard():
     """
 
 @app.get("/api/market/{exchange_id}/top-gainers")
-def exchange_top_gainers(exchange_id: int):
+@json_result
+def exchange_top_gainers(exchange_id: int, limit: int = 20):
     try:
-        query = text("""
-        SELECT
-            m.exchange_id,
-            e.region,
-            m.ticker,
-            m.company_name,
-            m.trade_date,
-            m.close_price,
-            m.price_in_usd,
-            m.change_pct,
-            m.volume,
-            m.value_traded,
-            m.value_traded_usd,
-            m.currency
-        FROM market_data_daily m
-        LEFT JOIN exchanges e ON m.exchange_id = e.exchange_id
-        INNER JOIN (
-            SELECT exchange_id, MAX(trade_date) AS latest_date
-            FROM market_data_daily
-            GROUP BY exchange_id
-        ) latest
-            ON m.exchange_id = latest.exchange_id
-            AND m.trade_date = latest.latest_date
-        WHERE m.exchange_id = :exchange_id
-        AND m.change_pct IS NOT NULL
-        ORDER BY m.change_pct DESC
-        LIMIT 20;
-        """)
-
-        df = pd.read_sql(query, con=engine, params={"exchange_id": exchange_id})
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
-        return df.to_dict(orient="records")
-
+        return market_snapshot.top("change_pct", exchange_id=exchange_id, limit=limit)
     except Exception as e:
         return {"error": "Exchange top gainers API failed", "details": str(e)}
 
 @app.get("/api/market/{exchange_id}/top-volume")
-def exchange_top_volume(exchange_id: int):
+@json_result
+def exchange_top_volume(exchange_id: int, limit: int = 20):
     try:
-        query = text("""
-        SELECT
-            m.exchange_id,
-            e.region,
-            m.ticker,
-            m.company_name,
-            m.trade_date,
-            m.close_price,
-            m.price_in_usd,
-            m.change_pct,
-            m.volume,
-            m.value_traded,
-            m.value_traded_usd,
-            m.currency
-        FROM market_data_daily m
-        LEFT JOIN exchanges e ON m.exchange_id = e.exchange_id
-        INNER JOIN (
-            SELECT exchange_id, MAX(trade_date) AS latest_date
-            FROM market_data_daily
-            GROUP BY exchange_id
-        ) latest
-            ON m.exchange_id = latest.exchange_id
-            AND m.trade_date = latest.latest_date
-        WHERE m.exchange_id = :exchange_id
-        AND m.volume IS NOT NULL
-        ORDER BY m.volume DESC
-        LIMIT 20;
-        """)
-
-        df = pd.read_sql(query, con=engine, params={"exchange_id": exchange_id})
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
-        return df.to_dict(orient="records")
-
+        return market_snapshot.top("volume", exchange_id=exchange_id, limit=limit)
     except Exception as e:
         return {"error": "Exchange top volume API failed", "details": str(e)}
 
 @app.get("/api/market/{exchange_id}/latest")
+@json_result
 def exchange_latest(exchange_id: int):
     try:
-        query = text("""
-        SELECT
-            m.exchange_id,
-            e.region,
-            m.ticker,
-            m.company_name,
-            m.trade_date,
-            m.open_price,
-            m.close_price,
-            m.price_in_usd,
-            m.change_pct,
-            m.volume,
-            m.value_traded,
-            m.value_traded_usd,
-            m.currency
-        FROM market_data_daily m
-        LEFT JOIN exchanges e ON m.exchange_id = e.exchange_id
-        INNER JOIN (
-            SELECT exchange_id, MAX(trade_date) AS latest_date
-            FROM market_data_daily
-            GROUP BY exchange_id
-        ) latest
-            ON m.exchange_id = latest.exchange_id
-            AND m.trade_date = latest.latest_date
-        WHERE m.exchange_id = :exchange_id
-        ORDER BY m.ticker;
-        """)
-
-        df = pd.read_sql(query, con=engine, params={"exchange_id": exchange_id})
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
-        return df.to_dict(orient="records")
-
+        return market_snapshot.latest(exchange_id=exchange_id)
     except Exception as e:
         return {"error": "Exchange latest API failed", "details": str(e)}
 
 @app.get("/api/market/{exchange_id}/top-losers")
-def exchange_top_losers(exchange_id: int):
+@json_result
+def exchange_top_losers(exchange_id: int, limit: int = 5):
     try:
-        query = text("""
-        SELECT m.exchange_id, e.region, m.ticker, m.company_name, m.trade_date,
-               m.close_price, m.price_in_usd, m.change_pct, m.volume, m.value_traded, m.value_traded_usd, m.currency
-        FROM market_data_daily m
-        LEFT JOIN exchanges e ON m.exchange_id = e.exchange_id
-        INNER JOIN (
-            SELECT exchange_id, MAX(trade_date) AS latest_date
-            FROM market_data_daily
-            GROUP BY exchange_id
-        ) latest
-        ON m.exchange_id = latest.exchange_id
-        AND m.trade_date = latest.latest_date
-        WHERE m.exchange_id = :exchange_id
-        AND m.change_pct IS NOT NULL
-        ORDER BY m.change_pct ASC
-        LIMIT 5;
-        """)
-        df = pd.read_sql(query, con=engine, params={"exchange_id": exchange_id})
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
-        return df.to_dict(orient="records")
+        return market_snapshot.top("change_pct", exchange_id=exchange_id, limit=limit, ascending=True)
     except Exception as e:
         return {"error": "Exchange top losers API failed", "details": str(e)}
 
 
 @app.get("/api/market/{exchange_id}/top-value")
-def exchange_top_value(exchange_id: int):
+@json_result
+def exchange_top_value(exchange_id: int, limit: int = 5):
     try:
-        query = text("""
-        SELECT m.exchange_id, e.region, m.ticker, m.company_name, m.trade_date,
-               m.close_price, m.price_in_usd, m.change_pct, m.volume,
-               m.value_traded, m.value_traded_usd, m.currency
-        FROM market_data_daily m
-        LEFT JOIN exchanges e ON m.exchange_id = e.exchange_id
-        INNER JOIN (
-            SELECT exchange_id, MAX(trade_date) AS latest_date
-            FROM market_data_daily
-            GROUP BY exchange_id
-        ) latest
-        ON m.exchange_id = latest.exchange_id
-        AND m.trade_date = latest.latest_date
-        WHERE m.exchange_id = :exchange_id
-        AND m.value_traded IS NOT NULL
-        ORDER BY m.value_traded_usd DESC
-        LIMIT 5;
-        """)
-        df = pd.read_sql(query, con=engine, params={"exchange_id": exchange_id})
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
-        return df.to_dict(orient="records")
+        return market_snapshot.top(
+            "value_traded_usd",
+            exchange_id=exchange_id,
+            limit=limit,
+            require="value_traded"
+        )
     except Exception as e:
         return {"error": "Exchange top value API failed", "details": str(e)}
 
 
+@app.get("/api/market/{exchange_id}/dashboard")
+@json_result
+def exchange_dashboard(exchange_id: int, limit: int = 5):
+    # exchange_id 0 is the "Global" tab on /market
+    try:
+        return market_snapshot.dashboard(
+            exchange_id=exchange_id or None,
+            limit=limit
+        )
+    except Exception as e:
+        return {"error": "Exchange dashboard API failed", "details": str(e)}
+
+
+# =========================
+# Bulk export (streamed, constant memory)
+# =========================
+def stream_rows(query, params, batch_size=2000):
+    # Server-side cursor: rows arrive from MySQL in batches instead of the
+    # driver buffering the whole result set.
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(query, params)
+        for rows in result.partitions(batch_size):
+            yield rows
+
+
+def ndjson_lines(batches):
+    for rows in batches:
+        yield b"".join(dumps(dict(zip(EXPORT_COLUMNS, row))) + b"\n" for row in rows)
+
+
+def csv_lines(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@app.get("/api/export/market")
+def export_market(
+    format: str = "ndjson",
+    exchange_id: int = None,
+    start: date = Query(None, alias="from"),
+    end: date = Query(None, alias="to"),
+    ticker: str = None
+):
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+
+    query, params = market_export_query(exchange_id, start, end, ticker)
+    batches = stream_rows(query, params)
+
+    if format == "csv":
+        body, media_type = csv_lines(batches), "text/csv"
+    else:
+        body, media_type = ndjson_lines(batches), "application/x-ndjson"
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="market_data_daily.{format}"'}
+    )
+
+
+def columnar_response(query, params, schema, format, filename):
+    if format not in ("arrow", "parquet"):
+        raise HTTPException(status_code=400, detail="format must be arrow or parquet")
+
+    batches = stream_rows(query, params, batch_size=50000)
+
+    if format == "parquet":
+        body, media_type = parquet_stream(batches, schema), PARQUET_MEDIA_TYPE
+    else:
+        body, media_type = arrow_stream(batches, schema), ARROW_MEDIA_TYPE
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'}
+    )
+
+
+@app.get("/api/bulk/market")
+def bulk_market(
+    format: str = "arrow",
+    exchange_id: int = None,
+    start: date = Query(None, alias="from"),
+    end: date = Query(None, alias="to"),
+    ticker: str = None
+):
+    query, params = market_export_query(exchange_id, start, end, ticker)
+    return columnar_response(query, params, MARKET_SCHEMA, format, "market_data_daily")
+
+
+@app.get("/api/bulk/food-prices")
+def bulk_food_prices(format: str = "arrow"):
+    return columnar_response(FOOD_PRICES_EXPORT_QUERY, {}, FOOD_PRICES_SCHEMA, format, "food_prices")
+
+
+async def stock_rows(ticker, start=None, end=None, limit=None):
+    # Ascending by trade_date; limit keeps the most recent rows. Served from
+    # the local ticker store when the loaders have written this ticker.
+    rows = ticker_store.records(ticker, start, end, limit)
+    if rows is not None:
+        return rows
+
+    query, params = stock_query(ticker, start, end, limit)
+    rows = await fetch_records(query, params, missing=None)
+    rows.reverse()
+    return rows
+
+
+@response_cache.cached("stock", ttl=3600)
+async def stock_bars(ticker, interval):
+    # Weekly/monthly bars over the full history, shared by every range request.
+    return resample(await stock_rows(ticker), interval)
+
+
 @app.get("/api/stock/{ticker}")
-def get_stock(ticker: str):
+@json_result
+@response_cache.cached("stock", ttl=300)
+async def get_stock(
+    ticker: str,
+    start: date = None,
+    end: date = None,
+    interval: str = "daily",
+    max_points: int = None
+):
+    if interval not in STOCK_INTERVALS:
+        raise HTTPException(status_code=400, detail="interval must be daily, weekly or monthly")
+
     try:
-        query = text("""
-        SELECT
-            exchange_id,
-            ticker,
-            company_name,
-            trade_date,
-            open_price,
-            high_price,
-            low_price,
-            close_price,
-            price_in_usd,
-            change_pct,
-            volume,
-            value_traded,
-            value_traded_usd,
-            currency
-        FROM market_data_daily
-        WHERE ticker = :ticker
-        ORDER BY trade_date DESC
-        LIMIT 90;
-        """)
-
-        df = pd.read_sql(query, con=engine, params={"ticker": ticker.upper()})
-        df = df.replace({np.nan: "-", np.inf: "-", -np.inf: "-"})
-        return df.to_dict(orient="records")
+        ticker = ticker.upper()
+        if interval == "daily":
+            # Without a range, the most recent 90 sessions as before.
+            limit = 90 if start is None and end is None else None
+            rows = await stock_rows(ticker, start, end, limit)
+        else:
+            rows = [
+                r for r in await stock_bars(ticker, interval)
+                if (start is None or r["trade_date"] >= start)
+                and (end is None or r["trade_date"] <= end)
+            ]
+
+        rows = downsample(rows, max(3, max_points) if max_points else None)
+        return clean_records(reversed(rows))
     except Exception as e:
         return {"error": "Stock API failed", "details": str(e)}
 
 
+async def stock_arrays(ticker):
+    # Full history as NumPy columns: a zero-copy view of the ticker store,
+    # or built once from MySQL for tickers the loaders have not written yet.
+    found = ticker_store.window(ticker)
+    if found is not None:
+        arr, _ = found
+        return arr["trade_date"], arr["close_price"], arr["high_price"], arr["low_price"], str(arr["currency"][-1]) or None
+
+    rows = await stock_rows(ticker)
+    if not rows:
+        return None
+    return (*history_arrays(rows), rows[-1]["currency"])
+
+
+@app.get("/api/stock/{ticker}/analytics")
+@json_result
+@response_cache.cached("stock", ttl=86400)
+async def get_stock_analytics(ticker: str):
+    # Memoized until the next load: loaders bump the "stock" namespace.
+    try:
+        ticker = ticker.upper()
+        found = await stock_arrays(ticker)
+        result = analytics(*found[:4]) if found is not None else None
+        if result is None:
+            return {"error": "Stock analytics API failed", "details": f"No price history for {ticker}"}
+        return {"ticker": ticker, "currency": found[4], **result}
+    except Exception as e:
+        return {"error": "Stock analytics API failed", "details": str(e)}
+
+
 @app.get("/stock/{ticker}", response_class=HTMLResponse)
 def stock_page(ticker: str):
     return f"""
@@ -1039,6 +1125,14 @@ def stock_page(ticker: str):
         <h1>{ticker.upper()} Stock Detail</h1>
         <p class="muted">Historical market data powered by DahoWealth.</p>
 
+        <label class="muted" for="range">Range</label>
+        <select id="range" onchange="loadHistory()">
+            <option value="3m" selected>3 months (daily)</option>
+            <option value="1y">1 year (daily)</option>
+            <option value="5y">5 years (weekly)</option>
+            <option value="max">Max (monthly)</option>
+        </select>
+
         <div class="grid">
             <div class="card">
                 <h3>Latest Price</h3>
@@ -1053,6 +1147,13 @@ def stock_page(ticker: str):
             </div>
         </div>
 
+        <div class="card">
+            <h3>Performance &amp; Risk</h3>
+            <table>
+                <tbody id="analyticsTable"><tr><td class="text">Loading...</td></tr></tbody>
+            </table>
+        </div>
+
         <div class="grid">
             <div class="card">
                 <h3>Price History</h3>
@@ -1100,6 +1201,21 @@ def stock_page(ticker: str):
                 }});
             }}
 
+            // Long ranges are resampled and LTTB-downsampled server-side.
+            const RANGES = {{
+                "3m": {{ months: 3, interval: "daily" }},
+                "1y": {{ months: 12, interval: "daily" }},
+                "5y": {{ months: 60, interval: "weekly" }},
+                "max": {{ months: null, interval: "monthly" }}
+            }};
+            const MAX_POINTS = 400;
+
+            function monthsAgo(months) {{
+                const d = new Date();
+                d.setMonth(d.getMonth() - months);
+                return d.toISOString().slice(0, 10);
+            }}
+
             async function loadStock() {{
                 const res = await fetch(`/api/stock/${{ticker}}`);
                 const data = await res.json();
@@ -1119,12 +1235,26 @@ def stock_page(ticker: str):
                 changeEl.innerText = isNaN(change) ? "-" : change.toFixed(2) + "%";
                 changeEl.className = "metric " + (change > 0 ? "pos" : change < 0 ? "neg" : "");
 
+                await loadHistory();
+            }}
+
+            async function loadHistory() {{
+                const range = RANGES[document.getElementById("range").value];
+                const params = new URLSearchParams({{ interval: range.interval, max_points: MAX_POINTS }});
+                if (range.months) params.set("start", monthsAgo(range.months));
+
+                const res = await fetch(`/api/stock/${{ticker}}?${{params}}`);
+                const data = await res.json();
+                if (!Array.isArray(data)) return;
+
                 const ordered = [...data].reverse();
                 const labels = ordered.map(r => r.trade_date);
                 const prices = ordered.map(r => Number(r.price_in_usd ?? r.close_price));
                 const volumes = ordered.map(r => Number(r.volume));
 
-                new Chart(document.getElementById("priceChart"), {{
+                Object.values(charts).forEach(c => c.destroy());
+
+                charts.price = new Chart(document.getElementById("priceChart"), {{
                     type: "line",
                     data: {{
                         labels: labels,
@@ -1146,7 +1276,7 @@ def stock_page(ticker: str):
                     }}
                 }});
 
-                new Chart(document.getElementById("volumeChart"), {{
+                charts.volume = new Chart(document.getElementById("volumeChart"), {{
                     type: "bar",
                     data: {{
                         labels: labels,
@@ -1184,7 +1314,30 @@ def stock_page(ticker: str):
                 }});
             }}
 
+            async function loadAnalytics() {{
+                const res = await fetch(`/api/stock/${{ticker}}/analytics`);
+                const a = await res.json();
+                const tbody = document.getElementById("analyticsTable");
+                if (a.error) {{
+                    tbody.innerHTML = `<tr><td class="text">${{a.details}}</td></tr>`;
+                    return;
+                }}
+
+                const pct = x => (x === null || x === undefined) ? "-" : fmtNum(x, 2) + "%";
+                const cls = x => x > 0 ? "pos" : x < 0 ? "neg" : "";
+                const r = a.returns_pct;
+                const rows = [
+                    ["Returns", ["1W", "1M", "3M", "YTD", "1Y"].map(k => `${{k}} <span class="${{cls(r[k])}}">${{pct(r[k])}}</span>`).join(" &nbsp; ")],
+                    ["Volatility (1Y, annualized)", pct(a.volatility_annualized_pct)],
+                    ["Drawdown", `current ${{pct(a.drawdown.current_pct)}} &nbsp; max ${{pct(a.drawdown.max_pct)}} (${{a.drawdown.max_peak_date}} → ${{a.drawdown.max_trough_date}})`],
+                    ["Moving averages", `MA20 ${{fmtNum(a.moving_averages.ma_20)}} &nbsp; MA50 ${{fmtNum(a.moving_averages.ma_50)}} &nbsp; MA200 ${{fmtNum(a.moving_averages.ma_200)}}`],
+                    ["52-week range", `${{fmtNum(a.week52.low)}} (${{a.week52.low_date}}) – ${{fmtNum(a.week52.high)}} (${{a.week52.high_date}})`]
+                ];
+                tbody.innerHTML = rows.map(([k, v]) => `<tr><td class="text">${{k}}</td><td class="text">${{v}}</td></tr>`).join("");
+            }}
+
             loadStock();
+            loadAnalytics();
         </script>
     </body>
     </html>
@@ -1193,138 +1346,53 @@ def stock_page(ticker: str):
 
 
 @app.get("/api/economy/summary")
-def economy_summary():
-    query = text("""
-        SELECT
-            MIN(week_start) AS first_week,
-            MAX(week_start) AS latest_week,
-            COUNT(*) AS total_rows,
-            COUNT(DISTINCT city_id) AS total_cities,
-            COUNT(DISTINCT product_id) AS total_products
-        FROM Benin_inflation.food_prices;
-    """)
-    with engine.connect() as conn:
-        row = conn.execute(query).mappings().first()
-        return dict(row)
+@json_result
+@response_cache.cached("economy", ttl=3600)
+async def economy_summary():
+    return (await fetch_records(ECONOMY_SUMMARY_QUERY, missing=None))[0]
 
 @app.get("/api/economy/latest-prices")
-def economy_latest_prices():
-    query = text("""
-        SELECT
-            f.week_start,
-            f.week_end,
-            c.city_name,
-            p.product_name,
-            f.price,
-            f.variation
-        FROM Benin_inflation.food_prices f
-        JOIN Benin_inflation.cities c ON f.city_id = c.city_id
-        JOIN Benin_inflation.products p ON f.product_id = p.product_id
-        WHERE f.week_start = (
-            SELECT MAX(week_start)
-            FROM Benin_inflation.food_prices
-        )
-        ORDER BY c.city_name, p.product_name;
-    """)
-    with engine.connect() as conn:
-        return [dict(r) for r in conn.execute(query).mappings().all()]
+@json_result
+@response_cache.cached("economy", ttl=3600)
+async def economy_latest_prices():
+    return await fetch_records(ECONOMY_LATEST_PRICES_QUERY, missing=None)
 
 @app.get("/api/economy/top-increases")
-def economy_top_increases():
-    query = text("""
-        SELECT
-            f.week_start,
-            c.city_name,
-            p.product_name,
-            f.price,
-            f.variation
-        FROM Benin_inflation.food_prices f
-        JOIN Benin_inflation.cities c ON f.city_id = c.city_id
-        JOIN Benin_inflation.products p ON f.product_id = p.product_id
-        WHERE f.week_start = (
-            SELECT MAX(week_start)
-            FROM Benin_inflation.food_prices
-        )
-        ORDER BY f.variation DESC
-        LIMIT 20;
-    """)
-    with engine.connect() as conn:
-        return [dict(r) for r in conn.execute(query).mappings().all()]
+@json_result
+@response_cache.cached("economy", ttl=3600)
+async def economy_top_increases():
+    return await fetch_records(ECONOMY_TOP_INCREASES_QUERY, missing=None)
 
 @app.get("/api/economy/cities")
-def economy_cities():
-    query = text("""
-        SELECT city_name
-        FROM Benin_inflation.cities
-        ORDER BY city_name;
-    """)
-    with engine.connect() as conn:
-        return [dict(r) for r in conn.execute(query).mappings().all()]
+@json_result
+@response_cache.cached("economy", ttl=3600)
+async def economy_cities():
+    return await fetch_records(ECONOMY_CITIES_QUERY, missing=None)
 
 
 @app.get("/api/economy/products")
-def economy_products():
-    query = text("""
-        SELECT product_name
-        FROM Benin_inflation.products
-        ORDER BY product_name;
-    """)
-    with engine.connect() as conn:
-        return [dict(r) for r in conn.execute(query).mappings().all()]
+@json_result
+@response_cache.cached("economy", ttl=3600)
+async def economy_products():
+    return await fetch_records(ECONOMY_PRODUCTS_QUERY, missing=None)
 
 
 @app.get("/api/economy/price-history")
-def economy_price_history(city: str, product: str):
-    query = text("""
-        SELECT
-            f.week_start,
-            f.price,
-            f.variation
-        FROM Benin_inflation.food_prices f
-        JOIN Benin_inflation.cities c ON f.city_id = c.city_id
-        JOIN Benin_inflation.products p ON f.product_id = p.product_id
-        WHERE c.city_name = :city
-          AND p.product_name = :product
-        ORDER BY f.week_start;
-    """)
-    with engine.connect() as conn:
-        return [dict(r) for r in conn.execute(query, {
-            "city": city,
-            "product": product
-        }).mappings().all()]
+@json_result
+@response_cache.cached("economy", ttl=3600)
+async def economy_price_history(city: str, product: str):
+    return await fetch_records(ECONOMY_PRICE_HISTORY_QUERY, {
+        "city": city,
+        "product": product
+    }, missing=None)
 @app.get("/api/economy/price-stats")
-def economy_price_stats(city: str, product: str):
-    query = text("""
-        SELECT
-            MIN(f.week_start) AS first_week,
-            MAX(f.week_start) AS latest_week,
-            MIN(f.price) AS lowest_price,
-            MAX(f.price) AS highest_price,
-            AVG(f.price) AS average_price
-        FROM Benin_inflation.food_prices f
-        JOIN Benin_inflation.cities c ON f.city_id = c.city_id
-        JOIN Benin_inflation.products p ON f.product_id = p.product_id
-        WHERE c.city_name = :city
-          AND p.product_name = :product;
-    """)
-
-    latest_query = text("""
-        SELECT
-            f.week_start,
-            f.price,
-            f.variation
-        FROM Benin_inflation.food_prices f
-        JOIN Benin_inflation.cities c ON f.city_id = c.city_id
-        JOIN Benin_inflation.products p ON f.product_id = p.product_id
-        WHERE c.city_name = :city
-          AND p.product_name = :product
-        ORDER BY f.week_start DESC
-        LIMIT 1;
-    """)
-
-    with engine.connect() as conn:
-        stats = dict(conn.execute(query, {"city": city, "product": product}).mappings().first())
-        latest = dict(conn.execute(latest_query, {"city": city, "product": product}).mappings().first())
+@json_result
+@response_cache.cached("economy", ttl=3600)
+async def economy_price_stats(city: str, product: str):
+    async with async_engine.connect() as conn:
+        params = {"city": city, "product": product}
+        stats = dict((await conn.execute(ECONOMY_PRICE_STATS_QUERY, params)).mappings().first())
+        latest = dict((await conn.execute(ECONOMY_LATEST_PRICE_QUERY, params)).mappings().first())
         stats.update({
             "latest_price": latest["price"],
             "latest_variation": latest["variation"],
@@ -1579,169 +1647,19 @@ def economy_page():
     </html>
     """
 
-FX_CURRENCIES = {
-    "XOF": {
-        "pair": "USD/XOF",
-        "ticker": "USDXOF=X",
-        "fallback": 590,
-        "name": "West African CFA franc",
-        "local_name": "Franc CFA BCEAO",
-        "region": "West Africa / UEMOA",
-        "countries": "Benin, Senegal, Côte d’Ivoire, Mali, Burkina Faso, Niger, Togo, Guinea-Bissau"
-    },
-    "XAF": {
-        "pair": "USD/XAF",
-        "ticker": "USDXAF=X",
-        "fallback": 655,
-        "name": "Central African CFA franc",
-        "local_name": "Franc CFA BEAC",
-        "region": "Central Africa / CEMAC",
-        "countries": "Cameroon, Chad, Central African Republic, Republic of Congo, Gabon, Equatorial Guinea"
-    },
-    "NGN": {
-        "pair": "USD/NGN",
-        "ticker": "USDNGN=X",
-        "fallback": 1580,
-        "name": "Nigerian naira",
-        "local_name": "Naira",
-        "region": "Nigeria",
-        "countries": "Nigeria"
-    },
-    "GHS": {
-        "pair": "USD/GHS",
-        "ticker": "USDGHS=X",
-        "fallback": 10.4,
-        "name": "Ghanaian cedi",
-        "local_name": "Cedi",
-        "region": "Ghana",
-        "countries": "Ghana"
-    },
-    "KES": {
-        "pair": "USD/KES",
-        "ticker": "USDKES=X",
-        "fallback": 129,
-        "name": "Kenyan shilling",
-        "local_name": "Shilling",
-        "region": "Kenya",
-        "countries": "Kenya"
-    },
-    "ZAR": {
-        "pair": "USD/ZAR",
-        "ticker": "USDZAR=X",
-        "fallback": 18.2,
-        "name": "South African rand",
-        "local_name": "Rand",
-        "region": "South Africa",
-        "countries": "South Africa"
-    },
-    "EUR": {
-        "pair": "EUR/USD",
-        "ticker": "EURUSD=X",
-        "fallback": 0.92,
-        "name": "Euro",
-        "local_name": "Euro",
-        "region": "Eurozone",
-        "countries": "Euro area"
-    }
-}
-
 
 @app.get("/api/fx/rates")
+@json_result
 def fx_rates():
-    results = []
-
-    for currency, info in FX_CURRENCIES.items():
-        ticker = info["ticker"]
-
-        try:
-            data = yf.download(
-                ticker,
-                period="1y",
-                interval="1d",
-                progress=False,
-                auto_adjust=False
-            )
-
-            if data.empty:
-                raise ValueError("No Yahoo Finance data returned")
-
-            if isinstance(data.columns, pd.MultiIndex):
-                close_series = data[("Close", ticker)]
-            else:
-                close_series = data["Close"]
-
-            latest = float(close_series.dropna().iloc[-1])
-            first = float(close_series.dropna().iloc[0])
-            change_1y = ((latest - first) / first) * 100
-
-            results.append({
-                "currency": currency,
-                "pair": info["pair"],
-                "ticker": ticker,
-                "currency_name": info["name"],
-                "local_name": info["local_name"],
-                "region": info["region"],
-                "countries": info["countries"],
-                "rate": round(latest, 4),
-                "change_1y": round(change_1y, 2),
-                "source": "Yahoo Finance"
-            })
-
-        except Exception:
-            results.append({
-                "currency": currency,
-                "pair": info["pair"],
-                "ticker": ticker,
-                "currency_name": info["name"],
-                "local_name": info["local_name"],
-                "region": info["region"],
-                "countries": info["countries"],
-                "rate": info["fallback"],
-                "change_1y": None,
-                "source": "Fallback static rate"
-            })
-
-    return results
+    return fx_rate_store.rates()
 
 
 @app.get("/api/fx/history")
-def fx_history(currency: str):
-    info = FX_CURRENCIES.get(currency)
-
-    if info is None:
-        return []
-
-    ticker = info["ticker"]
-
-    try:
-        df = yf.download(
-            ticker,
-            period="1y",
-            interval="1d",
-            progress=False,
-            auto_adjust=False
-        )
-
-        if df.empty:
-            return []
-
-        if isinstance(df.columns, pd.MultiIndex):
-            close_series = df[("Close", ticker)]
-        else:
-            close_series = df["Close"]
-
-        output = []
-
-        for date, rate in close_series.dropna().items():
-            output.append({
-                "date": date.strftime("%Y-%m-%d"),
-                "rate": float(rate)
-            })
-
-        return output
-
-    except Exception:
+@json_result
+def fx_history(currency: str, start: date = None, end: date = None):
+    if currency not in FX_CURRENCIES:
         return []
+    return fx_rate_store.history(currency, start=start, end=end)
 
 @app.get("/fx", response_class=HTMLResponse)
 def fx_page():
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import pandas as pd
+from sqlalchemy import text
+
+# Shared DataFrame -> MySQL writer for the loader scripts.
+#
+# mode="insert"  plain INSERT
+# mode="ignore"  INSERT IGNORE (existing keys are kept)
+# mode="upsert"  INSERT ... ON DUPLICATE KEY UPDATE update_columns
+#
+# Rows go out in chunks through executemany, which the MySQL drivers rewrite
+# into multi-row INSERTs. use_load_data=True streams each chunk through
+# LOAD DATA LOCAL INFILE instead; the server must allow local_infile and the
+# engine must be created with it enabled (e.g. ?local_infile=1 in DATABASE_URL).
+
+
+def _records(df, columns):
+    frame = df[columns].astype(object)
+    return frame.where(pd.notna(frame), None).to_dict(orient="records")
+
+
+def _insert_sql(table, columns, mode, update_columns):
+    verb = "INSERT IGNORE" if mode == "ignore" else "INSERT"
+    sql = f"""
+        {verb} INTO {table} ({", ".join(columns)})
+        VALUES ({", ".join(":" + c for c in columns)})
+    """
+    if mode == "upsert":
+        sql += "ON DUPLICATE KEY UPDATE " + ", ".join(
+            f"{c} = VALUES({c})" for c in update_columns
+        )
+    return sql
+
+
+def _load_data_chunk(conn, chunk, table, columns, mode, update_columns):
+    # Upserts cannot be expressed with LOAD DATA alone, so load into a
+    # temporary copy of the table and merge from there.
+    target = f"tmp_bulk_{table}" if mode == "upsert" else table
+    if mode == "upsert":
+        conn.execute(text(f"CREATE TEMPORARY TABLE {target} LIKE {table};"))
+
+    fd, path = tempfile.mkstemp(suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", newline="") as f:
+            chunk[columns].to_csv(f, index=False, header=False, na_rep="\\N")
+
+        ignore = "IGNORE" if mode == "ignore" else ""
+        conn.execute(text(f"""
+            LOAD DATA LOCAL INFILE '{path}'
+            {ignore} INTO TABLE {target}
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+            LINES TERMINATED BY '\\n'
+            ({", ".join(columns)});
+        """))
+    finally:
+        os.remove(path)
+
+    if mode == "upsert":
+        conn.execute(text(f"""
+            INSERT INTO {table} ({", ".join(columns)})
+            SELECT {", ".join(columns)} FROM {target}
+            ON DUPLICATE KEY UPDATE {", ".join(f"{c} = VALUES({c})" for c in update_columns)};
+        """))
+        conn.execute(text(f"DROP TEMPORARY TABLE {target};"))
+
+
+def bulk_write(conn, df, table, columns=None, mode="insert", update_columns=None,
+               chunk_size=1000, use_load_data=False):
+    if mode not in ("insert", "ignore", "upsert"):
+        raise ValueError(f"Unknown bulk_write mode: {mode}")
+
+    columns = columns or list(df.columns)
+    if mode == "upsert" and not update_columns:
+        update_columns = [c for c in columns if c not in ("ticker", "trade_date", "exchange_id")]
+
+    if df.empty:
+        return 0
+
+    sql = text(_insert_sql(table, columns, mode, update_columns))
+    written = 0
+
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        if use_load_data:
+            _load_data_chunk(conn, chunk, table, columns, mode, update_columns)
+        else:
+            conn.execute(sql, _records(chunk, columns))
+        written += len(chunk)
+
+    return written
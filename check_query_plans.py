@@ -0,0 +1,183 @@
+import os
+import sys
+from datetime import timedelta
+from sqlalchemy import bindparam, create_engine, text
+from dotenv import load_dotenv
+from api_queries import (
+    NGX_SQL_COLUMNS,
+    BRVM_SQL_COLUMNS,
+    ECONOMY_LATEST_PRICES_QUERY,
+    ECONOMY_TOP_INCREASES_QUERY,
+    ECONOMY_CITIES_QUERY,
+    ECONOMY_PRODUCTS_QUERY,
+    ECONOMY_PRICE_HISTORY_QUERY,
+    ECONOMY_PRICE_STATS_QUERY,
+    ECONOMY_LATEST_PRICE_QUERY,
+    latest_day_query,
+    staging_query,
+    stock_query,
+    market_export_query,
+    encode_cursor,
+)
+from market_snapshot import latest_dates_query, SNAPSHOT_COPY_QUERY
+from sync_engine import delta_bounds_query, _has_updated_at
+from fx_store import conversion_summary_query
+
+# EXPLAIN the hot queries and fail if one scans a whole table. Every query
+# is built by the same function or constant the endpoint/loader executes,
+# with sample parameters taken from the data; ranges reach back RANGE_DAYS
+# from the latest session, like the /stock page's default 3 month view.
+#
+#   python check_query_plans.py   (exit code 1 when a full scan is found)
+
+RANGE_DAYS = 90
+
+# Small tables that are fine to scan on every request: the dimension tables
+# and the one-row-per-ticker snapshot (the target of the snapshot copy).
+FULL_SCAN_ALLOWED = {"cities", "products", "c", "p", "market_latest_snapshot"}
+
+# Queries that read a whole table by design and are not checked.
+EXEMPT = {
+    "export/bulk market without filters": "streams all of market_data_daily",
+    "bulk food prices": "streams all of food_prices",
+    "economy summary": "aggregates all of food_prices; cached for an hour",
+    "snapshot load": "LatestSnapshot reads all of market_latest_snapshot",
+    "fx store load": "FXRateStore reads all of fx_rates_daily into memory",
+    "full staging sync": "sync_staging(full=True) copies the whole staging table",
+}
+
+
+def sample_params(conn):
+    row = conn.execute(text("""
+        SELECT exchange_id, ticker, currency, trade_date
+        FROM market_data_daily
+        ORDER BY trade_date DESC
+        LIMIT 1;
+    """)).mappings().first() or {}
+    food = conn.execute(text("""
+        SELECT c.city_name, p.product_name
+        FROM Benin_inflation.food_prices f
+        JOIN Benin_inflation.cities c ON f.city_id = c.city_id
+        JOIN Benin_inflation.products p ON f.product_id = p.product_id
+        LIMIT 1;
+    """)).mappings().first() or {}
+
+    latest = row.get("trade_date")
+    params = {
+        "exchange_id": row.get("exchange_id", 3),
+        "ticker": row.get("ticker", ""),
+        "currency": row.get("currency", "NGN"),
+        "latest": latest,
+        "since": latest - timedelta(days=RANGE_DAYS) if latest else None,
+        "city": food.get("city_name", ""),
+        "product": food.get("product_name", ""),
+    }
+    for table in ("ngx_daily", "brvm_daily"):
+        staged = conn.execute(text(f"""
+            SELECT trade_date, ticker
+            FROM {table}
+            ORDER BY trade_date DESC, ticker
+            LIMIT 1;
+        """)).mappings().first() or {}
+        params[table] = {
+            "day": staged.get("trade_date"),
+            "ticker": staged.get("ticker", ""),
+            "updated_at": _has_updated_at(conn, table),
+        }
+    return params
+
+
+def staging_checks(table, columns, sample, since):
+    day, ticker = sample["day"], sample["ticker"]
+    cursor = encode_cursor(day, ticker) if day else None
+    label = table.split("_")[0]
+    return [
+        (f"{label}-sql latest day", latest_day_query(table), {}),
+        (f"{label}-sql latest session", *staging_query(table, columns, day=day)),
+        (f"{label}-sql latest session, next page", *staging_query(table, columns, day=day, cursor=cursor)),
+        (f"{label}-sql ticker", *staging_query(table, columns, ticker=ticker)),
+        (f"{label}-sql ticker, next page", *staging_query(table, columns, ticker=ticker, cursor=cursor)),
+        (f"{label}-sql range", *staging_query(table, columns, start=since, end=day)),
+        (f"{label}-sql range, next page", *staging_query(table, columns, start=since, end=day, cursor=cursor)),
+    ]
+
+
+def sync_checks(conn, table, sample):
+    checks = [(
+        f"sync {table} by trade_date",
+        delta_bounds_query(table, "trade_date >= :since", sample["updated_at"]),
+        {"since": sample["day"]},
+    )]
+    if sample["updated_at"]:
+        last = conn.execute(text(f"SELECT MAX(updated_at) FROM {table};")).scalar()
+        checks.append((
+            f"sync {table} by updated_at",
+            delta_bounds_query(table, "updated_at > :since", True),
+            {"since": last},
+        ))
+    return checks
+
+
+def checks(conn, params):
+    since, latest = params["since"], params["latest"]
+    exchange_id, ticker = params["exchange_id"], params["ticker"]
+    food = {"city": params["city"], "product": params["product"]}
+
+    return [
+        *staging_checks("ngx_daily", NGX_SQL_COLUMNS, params["ngx_daily"], since),
+        *staging_checks("brvm_daily", BRVM_SQL_COLUMNS, params["brvm_daily"], since),
+        ("stock latest 90", *stock_query(ticker, limit=90)),
+        ("stock range", *stock_query(ticker, start=since, end=latest)),
+        ("stock full history (bars, analytics)", *stock_query(ticker)),
+        ("export by exchange and range", *market_export_query(exchange_id, since, latest)),
+        ("export by range", *market_export_query(start=since, end=latest)),
+        ("export by ticker", *market_export_query(ticker=ticker)),
+        ("snapshot latest dates, all exchanges", latest_dates_query(), {}),
+        ("snapshot latest dates, one exchange", latest_dates_query([exchange_id]), {"exchange_ids": [exchange_id]}),
+        ("snapshot copy", SNAPSHOT_COPY_QUERY, {"exchange_id": exchange_id, "latest_date": latest}),
+        *sync_checks(conn, "ngx_daily", params["ngx_daily"]),
+        *sync_checks(conn, "brvm_daily", params["brvm_daily"]),
+        ("usd conversion summary", conversion_summary_query("currency = :currency AND trade_date >= :start_date"),
+         {"currency": params["currency"], "start_date": since}),
+        ("economy latest prices", ECONOMY_LATEST_PRICES_QUERY, {}),
+        ("economy top increases", ECONOMY_TOP_INCREASES_QUERY, {}),
+        ("economy cities", ECONOMY_CITIES_QUERY, {}),
+        ("economy products", ECONOMY_PRODUCTS_QUERY, {}),
+        ("economy price history", ECONOMY_PRICE_HISTORY_QUERY, food),
+        ("economy price stats", ECONOMY_PRICE_STATS_QUERY, food),
+        ("economy latest price", ECONOMY_LATEST_PRICE_QUERY, food),
+    ]
+
+
+def full_scans(conn, query, params):
+    # Same SQL and bind parameters (including expanding IN lists) as executed
+    expanding = [bindparam(k, expanding=True) for k, v in params.items() if isinstance(v, list)]
+    plan = conn.execute(text("EXPLAIN " + query.text).bindparams(*expanding), params).mappings().all()
+    return [
+        step for step in plan
+        if step["type"] in ("ALL", "index") and step["table"] not in FULL_SCAN_ALLOWED
+    ]
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    engine = create_engine(os.getenv("DATABASE_URL"))
+
+    failed = 0
+    with engine.connect() as conn:
+        params = sample_params(conn)
+        for name, query, query_params in checks(conn, params):
+            scans = full_scans(conn, query, query_params)
+            if scans:
+                failed += 1
+                for step in scans:
+                    print(f"FULL SCAN  {name}: table={step['table']} type={step['type']} rows={step['rows']}")
+            else:
+                print(f"ok         {name}")
+
+    for name, reason in EXEMPT.items():
+        print(f"exempt     {name}: {reason}")
+
+    if failed:
+        print(f"{failed} quer{'y' if failed == 1 else 'ies'} fall back to a full scan; run migrations.py")
+        sys.exit(1)
@@ -0,0 +1,94 @@
+import math
+import inspect
+import functools
+from decimal import Decimal
+import numpy as np
+import orjson
+from fastapi.responses import JSONResponse, Response
+
+# Shared JSON result path for the API: DB cursor rows are mapped to plain
+# dicts in one pass and encoded with orjson, skipping the DataFrame round trip
+# and FastAPI's jsonable_encoder walk.
+#
+# orjson handles date/datetime and NumPy values natively and writes NaN/inf
+# as null; Decimal (MySQL DECIMAL columns) is encoded as a float.
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value) if value.is_finite() else None
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content):
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content):
+        return dumps(content)
+
+
+def json_result(func):
+    # Endpoints returning plain data are answered with a FastJSONResponse
+    # directly; FastAPI passes Response objects through without re-encoding.
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            return _as_response(await func(*args, **kwargs))
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _as_response(func(*args, **kwargs))
+    return wrapper
+
+
+def _as_response(result):
+    if isinstance(result, Response):
+        return result
+    return FastJSONResponse(result)
+
+
+def clean_value(value, missing="-"):
+    if value is None:
+        return missing
+    if isinstance(value, float):
+        return value if math.isfinite(value) else missing
+    if isinstance(value, Decimal):
+        return float(value) if value.is_finite() else missing
+    return value
+
+
+def rows_to_records(result, missing="-"):
+    # missing: what NULL / NaN / inf become ("-" for the tables the pages
+    # render directly, None where the frontend formats nulls itself).
+    keys = list(result.keys())
+    return [
+        {key: clean_value(value, missing) for key, value in zip(keys, row)}
+        for row in result
+    ]
+
+
+def frame_to_records(df, missing="-"):
+    keys = list(df.columns)
+    return [
+        {key: clean_value(value, missing) for key, value in zip(keys, row)}
+        for row in df.itertuples(index=False, name=None)
+    ]
+
+
+def clean_records(records, missing="-"):
+    # Same NULL / NaN handling for records already held as dicts
+    return [{key: clean_value(value, missing) for key, value in r.items()} for r in records]
+
+
+def to_float(values):
+    # The other direction: NULLs become NaN in a float64 array
+    return np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
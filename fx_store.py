@@ -0,0 +1,392 @@
+import time
+import bisect
+import threading
+from datetime import date, timedelta
+import pandas as pd
+import yfinance as yf
+from sqlalchemy import text
+
+FX_CURRENCIES = {
+    "XOF": {
+        "pair": "USD/XOF",
+        "ticker": "USDXOF=X",
+        "fallback": 590,
+        "name": "West African CFA franc",
+        "local_name": "Franc CFA BCEAO",
+        "region": "West Africa / UEMOA",
+        "countries": "Benin, Senegal, Côte d’Ivoire, Mali, Burkina Faso, Niger, Togo, Guinea-Bissau"
+    },
+    "XAF": {
+        "pair": "USD/XAF",
+        "ticker": "USDXAF=X",
+        "fallback": 655,
+        "name": "Central African CFA franc",
+        "local_name": "Franc CFA BEAC",
+        "region": "Central Africa / CEMAC",
+        "countries": "Cameroon, Chad, Central African Republic, Republic of Congo, Gabon, Equatorial Guinea"
+    },
+    "NGN": {
+        "pair": "USD/NGN",
+        "ticker": "USDNGN=X",
+        "fallback": 1580,
+        "name": "Nigerian naira",
+        "local_name": "Naira",
+        "region": "Nigeria",
+        "countries": "Nigeria"
+    },
+    "GHS": {
+        "pair": "USD/GHS",
+        "ticker": "USDGHS=X",
+        "fallback": 10.4,
+        "name": "Ghanaian cedi",
+        "local_name": "Cedi",
+        "region": "Ghana",
+        "countries": "Ghana"
+    },
+    "KES": {
+        "pair": "USD/KES",
+        "ticker": "USDKES=X",
+        "fallback": 129,
+        "name": "Kenyan shilling",
+        "local_name": "Shilling",
+        "region": "Kenya",
+        "countries": "Kenya"
+    },
+    "ZAR": {
+        "pair": "USD/ZAR",
+        "ticker": "USDZAR=X",
+        "fallback": 18.2,
+        "name": "South African rand",
+        "local_name": "Rand",
+        "region": "South Africa",
+        "countries": "South Africa"
+    },
+    "EUR": {
+        "pair": "EUR/USD",
+        "ticker": "EURUSD=X",
+        "fallback": 0.92,
+        "name": "Euro",
+        "local_name": "Euro",
+        "region": "Eurozone",
+        "countries": "Euro area"
+    }
+}
+
+
+def ensure_fx_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS fx_rates_daily (
+                currency VARCHAR(8) NOT NULL,
+                rate_date DATE NOT NULL,
+                ticker VARCHAR(16) NOT NULL,
+                rate DOUBLE NOT NULL,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    ON UPDATE CURRENT_TIMESTAMP,
+                PRIMARY KEY (currency, rate_date)
+            );
+        """))
+
+
+def download_fx_closes(currencies=None, period=None, start=None):
+    # One batched Yahoo call for every requested pair instead of one per currency.
+    currencies = currencies or list(FX_CURRENCIES)
+    tickers = {FX_CURRENCIES[c]["ticker"]: c for c in currencies}
+
+    data = yf.download(
+        list(tickers),
+        period=None if start else period,
+        start=start,
+        interval="1d",
+        progress=False,
+        auto_adjust=False,
+        group_by="column",
+        threads=True
+    )
+
+    if data.empty:
+        return []
+
+    closes = data["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=next(iter(tickers)))
+
+    rows = []
+    for ticker, series in closes.items():
+        currency = tickers.get(ticker)
+        if currency is None:
+            continue
+        for rate_date, rate in series.dropna().items():
+            rows.append({
+                "currency": currency,
+                "rate_date": rate_date.date(),
+                "ticker": ticker,
+                "rate": float(rate)
+            })
+    return rows
+
+
+def save_fx_rates(engine, rows):
+    if not rows:
+        return 0
+    with engine.begin() as conn:
+        conn.execute(text("""
+            INSERT INTO fx_rates_daily (currency, rate_date, ticker, rate)
+            VALUES (:currency, :rate_date, :ticker, :rate)
+            ON DUPLICATE KEY UPDATE
+                ticker = VALUES(ticker),
+                rate = VALUES(rate);
+        """), rows)
+    return len(rows)
+
+
+def update_fx_history(engine, currencies=None, backfill_period="5y"):
+    # Append only what is missing: currencies never stored get a full backfill,
+    # the rest are fetched from their last stored date (re-read because Yahoo
+    # keeps revising the current session's close).
+    ensure_fx_table(engine)
+    currencies = currencies or list(FX_CURRENCIES)
+
+    with engine.connect() as conn:
+        last_dates = {
+            r["currency"]: r["last_date"]
+            for r in conn.execute(text("""
+                SELECT currency, MAX(rate_date) AS last_date
+                FROM fx_rates_daily
+                GROUP BY currency;
+            """)).mappings().all()
+        }
+
+    missing = [c for c in currencies if last_dates.get(c) is None]
+    stored = [c for c in currencies if last_dates.get(c) is not None]
+
+    saved = 0
+    if missing:
+        saved += save_fx_rates(engine, download_fx_closes(missing, period=backfill_period))
+    if stored:
+        start = min(last_dates[c] for c in stored)
+        if start <= date.today():
+            saved += save_fx_rates(engine, download_fx_closes(stored, start=start))
+    return saved
+
+
+
+def load_fx_series(engine, currency):
+    with engine.connect() as conn:
+        rows = conn.execute(text("""
+            SELECT rate_date, rate
+            FROM fx_rates_daily
+            WHERE currency = :currency
+            ORDER BY rate_date;
+        """), {"currency": currency}).all()
+    return [r[0] for r in rows], [float(r[1]) for r in rows]
+
+
+def conversion_summary_query(filters):
+    # Per trade_date: the rates in use and how many rows still lack a conversion
+    return text(f"""
+        SELECT
+            trade_date,
+            MIN(used_ex_rate) AS min_rate,
+            MAX(used_ex_rate) AS max_rate,
+            SUM(
+                used_ex_rate IS NULL
+                OR (price_in_usd IS NULL AND close_price IS NOT NULL)
+                OR (value_traded_usd IS NULL AND value_traded IS NOT NULL)
+            ) AS missing
+        FROM market_data_daily
+        WHERE {filters}
+        GROUP BY trade_date
+        ORDER BY trade_date;
+    """)
+
+
+def apply_usd_conversion(engine, currency, start_date=None, end_date=None,
+                         exchange_id=None, chunk_dates=20):
+    # Converts each trade_date with the USD rate in force on that date (last
+    # fx_rates_daily close on or before it). Only dates whose rows are missing
+    # a conversion or carry a different rate are rewritten, a few dates per
+    # transaction so market_data_daily is never locked for long.
+    #
+    # Returns {"rows": rows rewritten, "first_date": earliest trade_date
+    # rewritten or None}, including when nothing could be converted.
+    if currency == "USD":
+        dates, rates = None, None
+    else:
+        dates, rates = load_fx_series(engine, currency)
+        if not dates:
+            print(f"No stored FX rates for {currency}; skipped.")
+            return {"rows": 0, "first_date": None}
+
+    filters = "currency = :currency"
+    params = {"currency": currency}
+    if start_date is not None:
+        filters += " AND trade_date >= :start_date"
+        params["start_date"] = start_date
+    if end_date is not None:
+        filters += " AND trade_date <= :end_date"
+        params["end_date"] = end_date
+    if exchange_id is not None:
+        filters += " AND exchange_id = :exchange_id"
+        params["exchange_id"] = exchange_id
+
+    with engine.connect() as conn:
+        per_date = conn.execute(conversion_summary_query(filters), params).mappings().all()
+
+    work = []
+    for r in per_date:
+        if dates is None:
+            rate = 1.0
+        else:
+            pos = bisect.bisect_right(dates, r["trade_date"]) - 1
+            if pos < 0:
+                # Older than any stored rate: leave it rather than guess.
+                continue
+            rate = rates[pos]
+
+        tolerance = rate * 1e-6
+        stale = (
+            r["missing"]
+            or abs(float(r["min_rate"]) - rate) > tolerance
+            or abs(float(r["max_rate"]) - rate) > tolerance
+        )
+        if stale:
+            work.append({**params, "trade_date": r["trade_date"], "rate": rate, "tolerance": tolerance})
+
+    updated = 0
+    first_date = None
+    for i in range(0, len(work), chunk_dates):
+        with engine.begin() as conn:
+            result = conn.execute(text(f"""
+                UPDATE market_data_daily
+                SET used_ex_rate = :rate,
+                    price_in_usd = close_price / :rate,
+                    value_traded_usd = value_traded / :rate
+                WHERE {filters}
+                AND trade_date = :trade_date
+                AND (
+                    used_ex_rate IS NULL
+                    OR ABS(used_ex_rate - :rate) > :tolerance
+                    OR (price_in_usd IS NULL AND close_price IS NOT NULL)
+                    OR (value_traded_usd IS NULL AND value_traded IS NOT NULL)
+                );
+            """), work[i:i + chunk_dates])
+            updated += result.rowcount
+            if result.rowcount and first_date is None:
+                first_date = work[i]["trade_date"]
+    return {"rows": updated, "first_date": first_date}
+
+def _fallback_row(currency, info):
+    return {
+        "currency": currency,
+        "pair": info["pair"],
+        "ticker": info["ticker"],
+        "currency_name": info["name"],
+        "local_name": info["local_name"],
+        "region": info["region"],
+        "countries": info["countries"],
+        "rate": info["fallback"],
+        "change_1y": None,
+        "source": "Fallback static rate"
+    }
+
+
+class FXRateStore:
+    # Full daily history per currency from fx_rates_daily, plus the latest
+    # rate/1Y change list derived from it. Rebuilt after every background
+    # refresh; readers only ever see finished objects.
+
+    def __init__(self, engine, refresh_interval=3600, backfill_period="5y"):
+        self.engine = engine
+        self.refresh_interval = refresh_interval
+        self.backfill_period = backfill_period
+        self._rates = [_fallback_row(c, info) for c, info in FX_CURRENCIES.items()]
+        self._history = {}
+        self._refreshed_at = None
+        self._thread = None
+
+    def rates(self):
+        return self._rates
+
+    def history(self, currency, start=None, end=None):
+        dates, rates = self._history.get(currency, ([], []))
+        if not dates:
+            return []
+
+        end = end or dates[-1]
+        start = start or end - timedelta(days=365)
+
+        lo = bisect.bisect_left(dates, start)
+        hi = bisect.bisect_right(dates, end)
+        return [
+            {"date": d.strftime("%Y-%m-%d"), "rate": r}
+            for d, r in zip(dates[lo:hi], rates[lo:hi])
+        ]
+
+    def load(self):
+        with self.engine.connect() as conn:
+            rows = conn.execute(text("""
+                SELECT currency, rate_date, rate
+                FROM fx_rates_daily
+                ORDER BY currency, rate_date;
+            """)).mappings().all()
+
+        history = {}
+        for r in rows:
+            dates, rates = history.setdefault(r["currency"], ([], []))
+            dates.append(r["rate_date"])
+            rates.append(float(r["rate"]))
+
+        results = []
+        for currency, info in FX_CURRENCIES.items():
+            dates, rates = history.get(currency, ([], []))
+            if not rates:
+                results.append(_fallback_row(currency, info))
+                continue
+
+            latest = rates[-1]
+            first = rates[bisect.bisect_left(dates, dates[-1] - timedelta(days=365))]
+            results.append({
+                "currency": currency,
+                "pair": info["pair"],
+                "ticker": info["ticker"],
+                "currency_name": info["name"],
+                "local_name": info["local_name"],
+                "region": info["region"],
+                "countries": info["countries"],
+                "rate": round(latest, 4),
+                "change_1y": round(((latest - first) / first) * 100, 2),
+                "source": "Yahoo Finance"
+            })
+
+        self._history = history
+        self._rates = results
+
+    def refresh(self):
+        update_fx_history(self.engine, backfill_period=self.backfill_period)
+        self.load()
+        self._refreshed_at = time.time()
+
+    def _run(self):
+        # Serve the stored history straight away; the first Yahoo download
+        # can take a while or fail outright when throttled.
+        try:
+            self.load()
+        except Exception as e:
+            print(f"FX load failed: {e}")
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"FX refresh failed: {e}")
+                # Yahoo may be throttling; keep serving what is already stored.
+                try:
+                    self.load()
+                except Exception:
+                    pass
+            time.sleep(self.refresh_interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="fx-refresh", daemon=True)
+            self._thread.start()
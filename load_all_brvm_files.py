@@ -1,60 +1,136 @@
 import os
 import glob
+import hashlib
 import pandas as pd
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
+from bulk_ingest import bulk_write
+from sync_engine import sync_staging
+from market_snapshot import refresh_market_latest_snapshot
+from ticker_store import update_ticker_store
+from response_cache import bump_data_version
 
 load_dotenv()
 engine = create_engine(os.getenv("DATABASE_URL"))
 
 folder = "/home/ec2-user/ngx/brvm_files"
-files = glob.glob(os.path.join(folder, "*.csv"))
+files = sorted(glob.glob(os.path.join(folder, "*.csv")))
+use_load_data = os.getenv("BULK_LOAD_DATA") == "1"
 
+
+def file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# One row per CSV already loaded, so unchanged files are never reparsed
 with engine.begin() as conn:
-    for file in files:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS brvm_file_manifest (
+            file_path VARCHAR(512) NOT NULL PRIMARY KEY,
+            file_size BIGINT NOT NULL,
+            file_mtime DOUBLE NOT NULL,
+            content_hash CHAR(64) NOT NULL,
+            row_count INT NOT NULL,
+            loaded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                ON UPDATE CURRENT_TIMESTAMP
+        );
+    """))
+
+with engine.connect() as conn:
+    manifest = {
+        r["file_path"]: r
+        for r in conn.execute(text("""
+            SELECT file_path, file_size, file_mtime, content_hash
+            FROM brvm_file_manifest;
+        """)).mappings().all()
+    }
+
+loaded = 0
+earliest_date = None
+
+for file in files:
+    stat = os.stat(file)
+    known = manifest.get(file)
+
+    if known is not None and known["file_size"] == stat.st_size and known["file_mtime"] == stat.st_mtime:
+        continue
+
+    content_hash = file_hash(file)
+
+    with engine.begin() as conn:
+        if known is not None and known["content_hash"] == content_hash:
+            # Touched but not changed: just remember the new mtime.
+            conn.execute(text("""
+                UPDATE brvm_file_manifest
+                SET file_size = :file_size, file_mtime = :file_mtime
+                WHERE file_path = :file_path;
+            """), {"file_path": file, "file_size": stat.st_size, "file_mtime": stat.st_mtime})
+            continue
+
         print("Loading:", file)
 
-        
         df = pd.read_csv(file)
         df["Trade_Date"] = pd.to_datetime(df["Trade_Date"]).dt.date
 
-        for _, row in df.iterrows():
-            conn.execute(text("""
-                INSERT IGNORE INTO brvm_daily
-                (ticker, name, volume, prev_close, open_price, close_price, change_pct, trade_date)
-                VALUES
-                (:ticker, :name, :volume, :prev_close, :open_price, :close_price, :change_pct, :trade_date)
-            """), {
-                "ticker": row["Ticker"],
-                "name": row["Name"],
-                "volume": row["Volume"],
-                "prev_close": row["Prev_Close"],
-                "open_price": row["Open"],
-                "close_price": row["Close"],
-                "change_pct": row["Change_pct"],
-                "trade_date": row["Trade_Date"]
-            })
+        df = df.rename(columns={
+            "Ticker": "ticker",
+            "Name": "name",
+            "Volume": "volume",
+            "Prev_Close": "prev_close",
+            "Open": "open_price",
+            "Close": "close_price",
+            "Change_pct": "change_pct",
+            "Trade_Date": "trade_date"
+        })
 
-    conn.execute(text("""
-        INSERT IGNORE INTO market_data_daily (
-            exchange_id, ticker, company_name, trade_date,
-            open_price, close_price, volume, prev_close,
-            change_pct, currency
+        # A file that changed since its last load replaces what it loaded before
+        bulk_write(
+            conn,
+            df,
+            "brvm_daily",
+            columns=["ticker", "name", "volume", "prev_close", "open_price", "close_price", "change_pct", "trade_date"],
+            mode="ignore" if known is None else "upsert",
+            update_columns=["name", "volume", "prev_close", "open_price", "close_price", "change_pct"],
+            use_load_data=use_load_data
         )
-        SELECT
-            2, ticker, name, trade_date,
-            open_price, close_price, volume, prev_close,
-            change_pct, 'XOF'
-        FROM brvm_daily;
-    """))
 
-    conn.execute(text("""
-        UPDATE market_data_daily
-        SET value_traded = close_price * volume
-        WHERE exchange_id = 2
-        AND value_traded IS NULL
-        AND close_price IS NOT NULL
-        AND volume IS NOT NULL;
-    """))
+        conn.execute(text("""
+            INSERT INTO brvm_file_manifest
+                (file_path, file_size, file_mtime, content_hash, row_count)
+            VALUES
+                (:file_path, :file_size, :file_mtime, :content_hash, :row_count)
+            ON DUPLICATE KEY UPDATE
+                file_size = VALUES(file_size),
+                file_mtime = VALUES(file_mtime),
+                content_hash = VALUES(content_hash),
+                row_count = VALUES(row_count);
+        """), {
+            "file_path": file,
+            "file_size": stat.st_size,
+            "file_mtime": stat.st_mtime,
+            "content_hash": content_hash,
+            "row_count": len(df)
+        })
+
+    loaded += 1
+    if not df.empty:
+        file_first = df["trade_date"].min()
+        if earliest_date is None or file_first < earliest_date:
+            earliest_date = file_first
+
+if loaded == 0:
+    print("No new or modified BRVM files.")
+else:
+    result = sync_staging(engine, "brvm_daily", since=earliest_date)
+    print("Rows synced into market_data_daily:", result["rows"])
+
+    refresh_market_latest_snapshot(engine, [2])
+    if result["rows"]:
+        update_ticker_store(engine, 2, since=result["first_date"])
+    bump_data_version(engine, "market", "stock")
 
-print("All BRVM files loaded and synced.")
+    print(f"{loaded} BRVM file(s) loaded and synced.")
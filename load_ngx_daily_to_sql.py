@@ -1,145 +1,80 @@
 import os
-import requests
+import sys
 import pandas as pd
-import numpy as np
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 from dotenv import load_dotenv
+from bulk_ingest import bulk_write
+from ngx_fetch import (
+    fetch_ngx_equities,
+    normalize_ngx,
+    payload_hash,
+    ensure_feed_state_table,
+    last_payload_hash,
+    save_payload_hash,
+)
+from sync_engine import sync_staging
+from market_snapshot import refresh_market_latest_snapshot
+from ticker_store import update_ticker_store
+from response_cache import bump_data_version
 
 load_dotenv()
 
 engine = create_engine(os.getenv("DATABASE_URL"))
 
-url = "https://doclib.ngxgroup.com/REST/api/statistics/equities/?market=&sector=&orderby=&pageSize=300&pageNo=0"
+df = normalize_ngx(fetch_ngx_equities())
+digest = payload_hash(df)
 
-r = requests.get(url, timeout=10)
-r.raise_for_status()
+ensure_feed_state_table(engine)
+with engine.connect() as conn:
+    unchanged = last_payload_hash(conn, "ngx_equities") == digest
 
-data = r.json()
-df = pd.DataFrame(data)
+if unchanged:
+    print(f"NGX feed unchanged since last run ({len(df)} rows); nothing written.")
+    sys.exit(0)
 
-expected = [
-    "Symbol", "OpeningPrice", "HighPrice", "LowPrice", "ClosePrice",
-    "Change", "Volume", "Value", "Trades", "TradeDate"
-]
-
-for col in expected:
-    if col not in df.columns:
-        df[col] = np.nan
-
-change = pd.to_numeric(df["Change"], errors="coerce")
-opening = pd.to_numeric(df["OpeningPrice"], errors="coerce")
+df["TradeDate"] = pd.to_datetime(df["TradeDate"]).dt.date
+df = df.rename(columns={
+    "Symbol": "ticker",
+    "OpeningPrice": "open_price",
+    "HighPrice": "high_price",
+    "LowPrice": "low_price",
+    "ClosePrice": "close_price",
+    "Change": "change_value",
+    "ChangePct": "change_pct",
+    "Volume": "volume",
+    "Value": "value_traded",
+    "Trades": "trades",
+    "TradeDate": "trade_date"
+})
 
-with np.errstate(divide="ignore", invalid="ignore"):
-    pct = (change / opening) * 100
+with engine.begin() as conn:
+    bulk_write(
+        conn,
+        df,
+        "ngx_daily",
+        columns=[
+            "ticker", "open_price", "high_price", "low_price", "close_price",
+            "change_value", "change_pct", "volume", "value_traded", "trades", "trade_date"
+        ],
+        mode="upsert",
+        update_columns=[
+            "open_price", "high_price", "low_price", "close_price",
+            "change_value", "change_pct", "volume", "value_traded", "trades"
+        ],
+        use_load_data=os.getenv("BULK_LOAD_DATA") == "1"
+    )
 
-df["ChangePct"] = np.where(np.isfinite(pct), np.round(pct, 2), np.nan)
+result = sync_staging(engine, "ngx_daily")
+print("Rows synced into market_data_daily:", result["rows"])
 
-df["TradeDate"] = pd.to_datetime(df["TradeDate"]).dt.date
-df = df.replace({np.nan: None})
+refresh_market_latest_snapshot(engine, [3])
+if result["rows"]:
+    update_ticker_store(engine, 3, since=result["first_date"])
+bump_data_version(engine, "market", "stock")
 
+# Only once everything downstream has run: a failure above leaves the old
+# hash, so the next run syncs this payload again instead of skipping it.
 with engine.begin() as conn:
-    for _, row in df.iterrows():
-        conn.execute(text("""
-            INSERT INTO ngx_daily
-            (
-                ticker,
-                open_price,
-                high_price,
-                low_price,
-                close_price,
-                change_value,
-                change_pct,
-                volume,
-                value_traded,
-                trades,
-                trade_date
-            )
-            VALUES
-            (
-                :ticker,
-                :open_price,
-                :high_price,
-                :low_price,
-                :close_price,
-                :change_value,
-                :change_pct,
-                :volume,
-                :value_traded,
-                :trades,
-                :trade_date
-            )
-            ON DUPLICATE KEY UPDATE
-                open_price = VALUES(open_price),
-                high_price = VALUES(high_price),
-                low_price = VALUES(low_price),
-                close_price = VALUES(close_price),
-                change_value = VALUES(change_value),
-                change_pct = VALUES(change_pct),
-                volume = VALUES(volume),
-                value_traded = VALUES(value_traded),
-                trades = VALUES(trades);
-        """), {
-            "ticker": row["Symbol"],
-            "open_price": row["OpeningPrice"],
-            "high_price": row["HighPrice"],
-            "low_price": row["LowPrice"],
-            "close_price": row["ClosePrice"],
-            "change_value": row["Change"],
-            "change_pct": row["ChangePct"],
-            "volume": row["Volume"],
-            "value_traded": row["Value"],
-            "trades": row["Trades"],
-            "trade_date": row["TradeDate"]
-        })
-            
-    conn.execute(text("""
-            INSERT INTO market_data_daily (
-                exchange_id,
-                ticker,
-                company_name,
-                trade_date,
-                open_price,
-                high_price,
-                low_price,
-                close_price,
-                volume,
-                value_traded,
-                change_pct,
-                currency,
-                used_ex_rate
-        )
-            SELECT
-                3,
-                ticker,
-                ticker,
-                trade_date,
-                open_price,
-                high_price,
-                low_price,
-                close_price,
-                volume,
-                value_traded,
-                change_pct,
-                'NGN',
-                1500
-            FROM ngx_daily
-            ON DUPLICATE KEY UPDATE
-                open_price = VALUES(open_price),
-                high_price = VALUES(high_price),
-                low_price = VALUES(low_price),
-                close_price = VALUES(close_price),
-                change_pct = VALUES(change_pct),
-                volume = VALUES(volume),
-                value_traded = VALUES(value_traded),
-                used_ex_rate = VALUES(used_ex_rate);
-    """))
-    conn.execute(text("""
-        UPDATE market_data_daily
-            SET 
-                price_in_usd = close_price / used_ex_rate,
-                value_traded_usd = value_traded / used_ex_rate
-            WHERE exchange_id = 3
-        AND used_ex_rate IS NOT NULL;
-    """))
+    save_payload_hash(conn, "ngx_equities", digest, len(df))
 
 print("NGX daily data loaded into SQL.")
@@ -0,0 +1,164 @@
+import os
+import sys
+from datetime import date
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+# Range partitioning of market_data_daily by trade_date, so the loaders'
+# per-date UPDATEs and the latest-session reads only touch the partition
+# holding that date. Partitions are monthly (p202610) or yearly (p2026),
+# optionally sub-partitioned by HASH(exchange_id), with an empty catch-all
+# pmax at the end that future partitions are split out of.
+#
+#   python market_partitions.py partition   one-off rebuild of the table
+#   python market_partitions.py maintain    keep PARTITIONS_AHEAD periods ready
+#
+# Partition pruning needs trade_date compared against constants: resolve
+# "latest date" in a separate query first rather than in a subquery.
+
+TABLE = "market_data_daily"
+GRANULARITY = os.getenv("MARKET_PARTITION_GRANULARITY", "month")
+SUBPARTITIONS = int(os.getenv("MARKET_SUBPARTITIONS", "0"))
+PARTITIONS_AHEAD = int(os.getenv("MARKET_PARTITIONS_AHEAD", "3"))
+
+
+def period_start(d, granularity):
+    return date(d.year, d.month, 1) if granularity == "month" else date(d.year, 1, 1)
+
+
+def next_period(d, granularity):
+    if granularity == "month":
+        return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+    return date(d.year + 1, 1, 1)
+
+
+def partition_name(start, granularity):
+    return start.strftime("p%Y%m" if granularity == "month" else "p%Y")
+
+
+def partition_bounds(first, upper, granularity):
+    # (name, exclusive upper bound) for every period from first's up to upper.
+    bounds = []
+    start = period_start(first, granularity)
+    while start < upper:
+        end = next_period(start, granularity)
+        bounds.append((partition_name(start, granularity), end))
+        start = end
+    return bounds
+
+
+def horizon(today, ahead, granularity):
+    upper = next_period(period_start(today, granularity), granularity)
+    for _ in range(ahead):
+        upper = next_period(upper, granularity)
+    return upper
+
+
+def _definitions(bounds):
+    parts = [f"PARTITION {name} VALUES LESS THAN ('{end.isoformat()}')" for name, end in bounds]
+    parts.append("PARTITION pmax VALUES LESS THAN (MAXVALUE)")
+    return ",\n".join(parts)
+
+
+def partitions(conn, table=TABLE):
+    return conn.execute(text("""
+        SELECT DISTINCT partition_name, partition_description, partition_ordinal_position
+        FROM information_schema.partitions
+        WHERE table_schema = DATABASE()
+        AND table_name = :table
+        AND partition_name IS NOT NULL
+        ORDER BY partition_ordinal_position;
+    """), {"table": table}).mappings().all()
+
+
+def unpartitionable_keys(conn, subpartitions, table=TABLE):
+    # MySQL requires every unique key to contain the partitioning columns.
+    required = {"trade_date"} | ({"exchange_id"} if subpartitions else set())
+    rows = conn.execute(text("""
+        SELECT index_name, column_name
+        FROM information_schema.statistics
+        WHERE table_schema = DATABASE()
+        AND table_name = :table
+        AND non_unique = 0;
+    """), {"table": table}).all()
+
+    keys = {}
+    for index_name, column_name in rows:
+        keys.setdefault(index_name, set()).add(column_name.lower())
+    return sorted(name for name, columns in keys.items() if not required <= columns)
+
+
+def partition_market_data(engine, granularity=GRANULARITY, subpartitions=SUBPARTITIONS, ahead=PARTITIONS_AHEAD):
+    with engine.connect() as conn:
+        if partitions(conn):
+            print(f"{TABLE} is already partitioned.")
+            return False
+
+        bad_keys = unpartitionable_keys(conn, subpartitions)
+        if bad_keys:
+            raise ValueError(
+                f"Unique keys {bad_keys} on {TABLE} do not include the partitioning columns"
+            )
+
+        first = conn.execute(text(f"SELECT MIN(trade_date) FROM {TABLE};")).scalar()
+
+    today = date.today()
+    bounds = partition_bounds(first or today, horizon(today, ahead, granularity), granularity)
+    sub = f"SUBPARTITION BY HASH (exchange_id) SUBPARTITIONS {subpartitions}" if subpartitions else ""
+
+    # Rebuilds the whole table; run it in a maintenance window.
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            ALTER TABLE {TABLE}
+            PARTITION BY RANGE COLUMNS (trade_date)
+            {sub}
+            (
+            {_definitions(bounds)}
+            );
+        """))
+    print(f"{TABLE} partitioned into {len(bounds)} {granularity}ly partitions plus pmax.")
+    return True
+
+
+def add_future_partitions(engine, ahead=PARTITIONS_AHEAD):
+    with engine.connect() as conn:
+        existing = partitions(conn)
+    if not existing:
+        return []
+
+    ranged = [p for p in existing if p["partition_description"] != "MAXVALUE"]
+    if not ranged:
+        return []
+
+    last = ranged[-1]
+    granularity = "month" if len(last["partition_name"]) == 7 else "year"
+    last_bound = date.fromisoformat(last["partition_description"].strip("'"))
+
+    bounds = partition_bounds(last_bound, horizon(date.today(), ahead, granularity), granularity)
+    if not bounds:
+        return []
+
+    # pmax is empty while partitions are kept ahead of the data, so splitting
+    # it only rewrites metadata.
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            ALTER TABLE {TABLE}
+            REORGANIZE PARTITION pmax INTO (
+            {_definitions(bounds)}
+            );
+        """))
+    return [name for name, _ in bounds]
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    command = sys.argv[1] if len(sys.argv) > 1 else "maintain"
+
+    if command == "partition":
+        partition_market_data(engine)
+    elif command == "maintain":
+        added = add_future_partitions(engine)
+        print(f"Added partitions: {', '.join(added)}" if added else "Partitions already cover the horizon.")
+    else:
+        sys.exit(f"Unknown command: {command} (use partition or maintain)")
@@ -0,0 +1,224 @@
+import os
+import time
+import threading
+import numpy as np
+from sqlalchemy import bindparam, create_engine, text
+from dotenv import load_dotenv
+from fast_json import clean_value, to_float
+
+# Latest trading session per exchange, rebuilt by the loaders once they commit
+# so the API never has to recompute MAX(trade_date) over the full history.
+SNAPSHOT_COLUMNS = [
+    "exchange_id",
+    "ticker",
+    "company_name",
+    "trade_date",
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+    "price_in_usd",
+    "change_pct",
+    "volume",
+    "value_traded",
+    "value_traded_usd",
+    "currency",
+]
+
+_columns = ", ".join(SNAPSHOT_COLUMNS)
+
+
+def ensure_snapshot_table(engine):
+    # Column types are copied from market_data_daily so the two never drift.
+    # DDL commits implicitly in MySQL, so keep it out of the refresh transaction.
+    with engine.begin() as conn:
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS market_latest_snapshot (
+                refreshed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (exchange_id, ticker)
+            )
+            SELECT {_columns}
+            FROM market_data_daily
+            WHERE 1 = 0;
+        """))
+
+
+def _scope(exchange_ids):
+    if exchange_ids is None:
+        return "", {}, []
+    return "WHERE exchange_id IN :exchange_ids", {"exchange_ids": list(exchange_ids)}, [
+        bindparam("exchange_ids", expanding=True)
+    ]
+
+
+def latest_dates_query(exchange_ids=None):
+    scope, _, expanding = _scope(exchange_ids)
+    return text(f"""
+        SELECT exchange_id, MAX(trade_date) AS latest_date
+        FROM market_data_daily
+        {scope}
+        GROUP BY exchange_id;
+    """).bindparams(*expanding)
+
+
+SNAPSHOT_COPY_QUERY = text(f"""
+    INSERT INTO market_latest_snapshot ({_columns})
+    SELECT {_columns}
+    FROM market_data_daily
+    WHERE exchange_id = :exchange_id
+    AND trade_date = :latest_date;
+""")
+
+
+def refresh_market_latest_snapshot(engine, exchange_ids=None):
+    ensure_snapshot_table(engine)
+
+    scope, params, expanding = _scope(exchange_ids)
+
+    with engine.begin() as conn:
+        # Latest dates are resolved first and passed as constants, so on a
+        # partitioned market_data_daily each copy reads a single partition.
+        latest = conn.execute(latest_dates_query(exchange_ids), params).all()
+
+        conn.execute(text(f"""
+            DELETE FROM market_latest_snapshot
+            {scope};
+        """).bindparams(*expanding), params)
+
+        for exchange_id, latest_date in latest:
+            conn.execute(SNAPSHOT_COPY_QUERY, {"exchange_id": exchange_id, "latest_date": latest_date})
+
+
+# Columns the API ranks on; everything else is only ever echoed back.
+RANK_COLUMNS = ["change_pct", "volume", "value_traded", "value_traded_usd"]
+
+LATEST_COLUMNS = [
+    "exchange_id", "region", "ticker", "company_name", "trade_date",
+    "open_price", "close_price", "price_in_usd", "change_pct", "volume",
+    "value_traded", "value_traded_usd", "currency",
+]
+
+RANKING_COLUMNS = [
+    "exchange_id", "region", "ticker", "company_name", "trade_date",
+    "close_price", "price_in_usd", "change_pct", "volume",
+    "value_traded", "value_traded_usd", "currency",
+]
+
+
+class LatestSnapshot:
+    # In-memory, column-oriented copy of market_latest_snapshot. The version
+    # (last refresh time + row count) is polled at most every check_interval
+    # seconds and the arrays are rebuilt only when it changes.
+
+    def __init__(self, engine, check_interval=30):
+        self.engine = engine
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._state = None
+        self._checked_at = 0.0
+
+    def _version(self, conn):
+        row = conn.execute(text("""
+            SELECT MAX(refreshed_at) AS refreshed_at, COUNT(*) AS row_count
+            FROM market_latest_snapshot;
+        """)).mappings().first()
+        return (row["refreshed_at"], row["row_count"])
+
+    def _load(self, conn, version):
+        rows = conn.execute(text(f"""
+            SELECT {", ".join("m." + c for c in SNAPSHOT_COLUMNS)}, e.region
+            FROM market_latest_snapshot m
+            LEFT JOIN exchanges e ON m.exchange_id = e.exchange_id
+            ORDER BY m.exchange_id, m.ticker;
+        """)).mappings().all()
+
+        values = {}
+        for col in SNAPSHOT_COLUMNS + ["region"]:
+            arr = np.empty(len(rows), dtype=object)
+            arr[:] = [clean_value(r[col]) for r in rows]
+            values[col] = arr
+
+        keys = {col: to_float([r[col] for r in rows]) for col in RANK_COLUMNS}
+
+        exchange = np.array([r["exchange_id"] for r in rows], dtype=np.int64)
+        by_exchange = {
+            int(e): np.flatnonzero(exchange == e) for e in np.unique(exchange)
+        }
+
+        return {
+            "version": version,
+            "values": values,
+            "keys": keys,
+            "all": np.arange(len(rows)),
+            "by_exchange": by_exchange,
+        }
+
+    def state(self):
+        now = time.monotonic()
+        if self._state is not None and now - self._checked_at < self.check_interval:
+            return self._state
+
+        with self._lock:
+            if self._state is not None and now - self._checked_at < self.check_interval:
+                return self._state
+            with self.engine.connect() as conn:
+                version = self._version(conn)
+                if self._state is None or self._state["version"] != version:
+                    self._state = self._load(conn, version)
+            self._checked_at = time.monotonic()
+            return self._state
+
+    def _rows(self, state, exchange_id):
+        if exchange_id is None:
+            return state["all"]
+        return state["by_exchange"].get(exchange_id, state["all"][:0])
+
+    def _records(self, state, idx, columns):
+        values = state["values"]
+        return [{c: values[c][i] for c in columns} for i in idx]
+
+    def _latest(self, state, exchange_id, columns=None):
+        return self._records(state, self._rows(state, exchange_id), columns or LATEST_COLUMNS)
+
+    def _top(self, state, key, exchange_id, limit, ascending=False, require=None, columns=None):
+        idx = self._rows(state, exchange_id)
+
+        required = state["keys"][require or key][idx]
+        idx = idx[~np.isnan(required)]
+
+        # Rank on a descending-as-ascending copy so NaNs always land last.
+        vals = state["keys"][key][idx]
+        vals = np.where(np.isnan(vals), np.inf, vals if ascending else -vals)
+
+        limit = max(0, min(int(limit), len(idx)))
+        if limit == 0:
+            return []
+        if limit < len(vals):
+            part = np.argpartition(vals, limit - 1)[:limit]
+        else:
+            part = np.arange(len(vals))
+        order = part[np.argsort(vals[part], kind="stable")]
+
+        return self._records(state, idx[order], columns or RANKING_COLUMNS)
+
+    def latest(self, exchange_id=None, columns=None):
+        return self._latest(self.state(), exchange_id, columns)
+
+    def top(self, key, exchange_id=None, limit=20, ascending=False, require=None, columns=None):
+        return self._top(self.state(), key, exchange_id, limit, ascending, require, columns)
+
+    def dashboard(self, exchange_id=None, limit=5):
+        # Every /market panel from the same snapshot state, so they always agree.
+        state = self.state()
+        return {
+            "gainers": self._top(state, "change_pct", exchange_id, limit),
+            "losers": self._top(state, "change_pct", exchange_id, limit, ascending=True),
+            "volume": self._top(state, "volume", exchange_id, limit),
+            "value": self._top(state, "value_traded_usd", exchange_id, limit, require="value_traded"),
+            "latest": self._latest(state, exchange_id),
+        }
+
+if __name__ == "__main__":
+    load_dotenv()
+    refresh_market_latest_snapshot(create_engine(os.getenv("DATABASE_URL")))
+    print("market_latest_snapshot rebuilt.")
@@ -0,0 +1,115 @@
+import os
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+# Versioned schema changes for tables the API reads but no loader creates
+# indexes on. Applied versions are recorded in schema_migrations; run
+# `python migrations.py` after deploying. Each index is skipped when an
+# existing index already starts with the same columns (e.g. the unique key
+# the loaders upsert against), so migrations are safe on any existing schema.
+#
+# Table rebuilds are not migrations: partitioning market_data_daily is the
+# explicit `python market_partitions.py partition` step, run in a maintenance
+# window.
+MIGRATIONS = [
+    (1, "market_data_daily access paths", [
+        # Latest session per exchange (snapshot refresh, US gap scan)
+        ("market_data_daily", "idx_mdd_exchange_date_ticker", ["exchange_id", "trade_date", "ticker"]),
+        # /api/stock/{ticker}: ticker ORDER BY trade_date DESC
+        ("market_data_daily", "idx_mdd_ticker_date", ["ticker", "trade_date"]),
+        # Date-range exports ordered by trade_date, exchange_id, ticker
+        ("market_data_daily", "idx_mdd_date_exchange_ticker", ["trade_date", "exchange_id", "ticker"]),
+        # USD conversion summary grouped per date for one currency
+        ("market_data_daily", "idx_mdd_currency_date_rate", ["currency", "trade_date", "used_ex_rate"]),
+    ]),
+    (2, "staging table keyset pages", [
+        ("ngx_daily", "idx_ngx_date_ticker", ["trade_date", "ticker"]),
+        ("ngx_daily", "idx_ngx_ticker_date", ["ticker", "trade_date"]),
+        ("brvm_daily", "idx_brvm_date_ticker", ["trade_date", "ticker"]),
+        ("brvm_daily", "idx_brvm_ticker_date", ["ticker", "trade_date"]),
+    ]),
+    (3, "food price lookups", [
+        # Latest week across all cities/products, covering price and variation
+        ("Benin_inflation.food_prices", "idx_fp_week_city_product",
+         ["week_start", "city_id", "product_id", "price", "variation"]),
+        # One city/product history, covering price and variation
+        ("Benin_inflation.food_prices", "idx_fp_city_product_week",
+         ["city_id", "product_id", "week_start", "price", "variation"]),
+    ]),
+]
+
+
+def ensure_migrations_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INT NOT NULL PRIMARY KEY,
+                description VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            );
+        """))
+
+
+def _split(table):
+    schema, _, name = table.rpartition(".")
+    return schema or None, name
+
+
+def existing_indexes(conn, table):
+    schema, name = _split(table)
+    rows = conn.execute(text(f"""
+        SELECT index_name, column_name
+        FROM information_schema.statistics
+        WHERE table_schema = {":schema" if schema else "DATABASE()"}
+        AND table_name = :table
+        ORDER BY index_name, seq_in_index;
+    """), {"schema": schema, "table": name}).all()
+
+    indexes = {}
+    for index_name, column_name in rows:
+        indexes.setdefault(index_name, []).append(column_name.lower())
+    return indexes
+
+
+def ensure_index(conn, table, index_name, columns):
+    wanted = [c.lower() for c in columns]
+    for name, existing in existing_indexes(conn, table).items():
+        if name == index_name or existing[:len(wanted)] == wanted:
+            return False
+    conn.execute(text(f"CREATE INDEX {index_name} ON {table} ({', '.join(columns)});"))
+    return True
+
+
+def migrate(engine, target=None):
+    ensure_migrations_table(engine)
+    with engine.connect() as conn:
+        applied = {r[0] for r in conn.execute(text("SELECT version FROM schema_migrations;")).all()}
+
+    done = []
+    for version, description, indexes in MIGRATIONS:
+        if version in applied or (target is not None and version > target):
+            continue
+
+        # Index DDL commits implicitly in MySQL; each index is its own step
+        # and ensure_index is idempotent, so a failed run can simply be rerun.
+        for table, index_name, columns in indexes:
+            with engine.begin() as conn:
+                if ensure_index(conn, table, index_name, columns):
+                    print(f"  created {index_name} on {table}")
+
+        with engine.begin() as conn:
+            conn.execute(text("""
+                INSERT INTO schema_migrations (version, description)
+                VALUES (:version, :description);
+            """), {"version": version, "description": description})
+        done.append(version)
+        print(f"Applied migration {version}: {description}")
+
+    return done
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    if not migrate(engine):
+        print("Schema is up to date.")
@@ -0,0 +1,130 @@
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from sqlalchemy import text
+
+NGX_EQUITIES_URL = "https://doclib.ngxgroup.com/REST/api/statistics/equities/"
+PAGE_SIZE = 300
+MAX_WORKERS = 4
+MAX_PAGES = 50
+
+EXPECTED_COLUMNS = [
+    "Symbol", "OpeningPrice", "HighPrice", "LowPrice", "ClosePrice",
+    "Change", "Volume", "Value", "Trades", "TradeDate"
+]
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    # One pooled, retrying session shared by every caller in the process.
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+            adapter = HTTPAdapter(pool_connections=MAX_WORKERS, pool_maxsize=MAX_WORKERS, max_retries=retry)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def fetch_page(page_no, page_size=PAGE_SIZE, timeout=10):
+    r = get_session().get(
+        NGX_EQUITIES_URL,
+        params={"market": "", "sector": "", "orderby": "", "pageSize": page_size, "pageNo": page_no},
+        timeout=timeout
+    )
+    r.raise_for_status()
+    return r.json() or []
+
+
+def fetch_ngx_equities(page_size=PAGE_SIZE, timeout=10, max_pages=MAX_PAGES):
+    # Page 0 tells us whether there is more; further pages are requested in
+    # concurrent waves until one comes back short, one repeats symbols we
+    # already have (the feed ignoring pageNo) or max_pages is reached.
+    records = fetch_page(0, page_size, timeout)
+    if len(records) < page_size:
+        return records
+    symbols = {r.get("Symbol") for r in records}
+
+    next_page = 1
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        while next_page < max_pages:
+            pages = list(range(next_page, min(next_page + MAX_WORKERS, max_pages)))
+            results = list(pool.map(lambda p: fetch_page(p, page_size, timeout), pages))
+            for page in results:
+                new = {r.get("Symbol") for r in page} - symbols
+                if not new:
+                    return records
+                symbols |= new
+                records.extend(page)
+                if len(page) < page_size:
+                    return records
+            next_page += len(pages)
+
+    print(f"NGX feed still returning full pages after {max_pages}; stopped paging.")
+    return records
+
+
+def normalize_ngx(records):
+    df = pd.DataFrame(records)
+
+    for col in EXPECTED_COLUMNS:
+        if col not in df.columns:
+            df[col] = np.nan
+
+    # Pages can overlap if the feed shifts between requests
+    df = df.drop_duplicates(subset=["Symbol", "TradeDate"], keep="last")
+
+    change = pd.to_numeric(df["Change"], errors="coerce")
+    opening = pd.to_numeric(df["OpeningPrice"], errors="coerce")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct = (change / opening) * 100
+
+    df["ChangePct"] = np.where(np.isfinite(pct), np.round(pct, 2), np.nan)
+
+    return df[EXPECTED_COLUMNS + ["ChangePct"]].sort_values("Symbol").reset_index(drop=True)
+
+
+def payload_hash(df):
+    records = df.astype(object).where(pd.notna(df), None).to_dict(orient="records")
+    encoded = json.dumps(records, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def ensure_feed_state_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS feed_fetch_state (
+                feed VARCHAR(64) NOT NULL PRIMARY KEY,
+                payload_hash CHAR(64) NOT NULL,
+                row_count INT NOT NULL,
+                changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    ON UPDATE CURRENT_TIMESTAMP
+            );
+        """))
+
+
+def last_payload_hash(conn, feed):
+    return conn.execute(text("""
+        SELECT payload_hash FROM feed_fetch_state WHERE feed = :feed;
+    """), {"feed": feed}).scalar()
+
+
+def save_payload_hash(conn, feed, digest, row_count):
+    conn.execute(text("""
+        INSERT INTO feed_fetch_state (feed, payload_hash, row_count)
+        VALUES (:feed, :payload_hash, :row_count)
+        ON DUPLICATE KEY UPDATE
+            payload_hash = VALUES(payload_hash),
+            row_count = VALUES(row_count);
+    """), {"feed": feed, "payload_hash": digest, "row_count": row_count})
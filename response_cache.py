@@ -0,0 +1,225 @@
+import time
+import asyncio
+import inspect
+import threading
+import functools
+from collections import OrderedDict
+from sqlalchemy import text
+
+# Loader scripts run in their own processes, so they cannot clear the API's
+# memory directly. Instead they bump a per-namespace counter in data_versions
+# after committing, and every ResponseCache drops that namespace on its next poll.
+
+
+def ensure_data_versions_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS data_versions (
+                namespace VARCHAR(64) NOT NULL PRIMARY KEY,
+                version BIGINT NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    ON UPDATE CURRENT_TIMESTAMP
+            );
+        """))
+
+
+def bump_data_version(engine, *namespaces):
+    ensure_data_versions_table(engine)
+    with engine.begin() as conn:
+        for namespace in namespaces:
+            conn.execute(text("""
+                INSERT INTO data_versions (namespace, version)
+                VALUES (:namespace, 1)
+                ON DUPLICATE KEY UPDATE version = version + 1;
+            """), {"namespace": namespace})
+
+
+class ResponseCache:
+    # TTL + LRU cache for read-only endpoints. Entries are keyed on the
+    # endpoint and the path/query parameters FastAPI binds to it.
+
+    def __init__(self, engine=None, max_entries=512, version_check_interval=30):
+        self.engine = engine
+        self.max_entries = max_entries
+        self.version_check_interval = version_check_interval
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._versions = None
+        self._versions_checked_at = 0.0
+        self._stats = {}
+
+    def _count(self, namespace, field):
+        stats = self._stats.setdefault(
+            namespace, {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+        )
+        stats[field] += 1
+
+    def _poll_due(self):
+        return (
+            self.engine is not None
+            and time.monotonic() - self._versions_checked_at >= self.version_check_interval
+        )
+
+    def _poll_versions(self):
+        if not self._poll_due():
+            return
+        self._versions_checked_at = time.monotonic()
+
+        try:
+            with self.engine.connect() as conn:
+                rows = conn.execute(text(
+                    "SELECT namespace, version FROM data_versions;"
+                )).mappings().all()
+        except Exception:
+            # Table not created yet or DB hiccup: fall back to TTL expiry only.
+            return
+
+        versions = {r["namespace"]: r["version"] for r in rows}
+        previous, self._versions = self._versions, versions
+        if previous is None:
+            return
+        changed = [ns for ns, v in versions.items() if previous.get(ns) != v]
+        if changed:
+            self.invalidate(*changed)
+
+    def get(self, key):
+        self._poll_versions()
+        return self._lookup(key)
+
+    def _lookup(self, key):
+        namespace = key[0]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._count(namespace, "hits")
+                return True, entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self._count(namespace, "misses")
+            return False, None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._count(evicted[0], "evictions")
+
+    def invalidate(self, *namespaces):
+        with self._lock:
+            if not namespaces:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                keys = [k for k in self._entries if k[0] in namespaces]
+                for k in keys:
+                    del self._entries[k]
+                dropped = len(keys)
+            for namespace in namespaces:
+                self._count(namespace, "invalidations")
+            return dropped
+
+    def stats(self):
+        with self._lock:
+            by_namespace = {ns: dict(s) for ns, s in self._stats.items()}
+            entries = len(self._entries)
+        hits = sum(s["hits"] for s in by_namespace.values())
+        misses = sum(s["misses"] for s in by_namespace.values())
+        return {
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+            "namespaces": by_namespace,
+        }
+
+    def _store(self, key, value, ttl):
+        # Endpoints report failures as {"error": ...}; never pin those.
+        if not (isinstance(value, dict) and "error" in value):
+            self.set(key, value, ttl)
+
+    def cached(self, namespace, ttl):
+        def decorator(func):
+            if inspect.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    key = (namespace, func.__name__, args, tuple(sorted(kwargs.items())))
+                    # The version poll uses the sync engine; keep it off the event loop.
+                    if self._poll_due():
+                        await asyncio.to_thread(self._poll_versions)
+                    hit, value = self._lookup(key)
+                    if hit:
+                        return value
+                    value = await func(*args, **kwargs)
+                    self._store(key, value, ttl)
+                    return value
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = (namespace, func.__name__, args, tuple(sorted(kwargs.items())))
+                hit, value = self.get(key)
+                if hit:
+                    return value
+                value = func(*args, **kwargs)
+                self._store(key, value, ttl)
+                return value
+            return wrapper
+        return decorator
+
+
+class SingleFlight:
+    # Short-TTL cache for one upstream resource. Concurrent misses share a
+    # single in-flight fetch, and when the upstream fails the last good value
+    # is served for up to max_stale seconds.
+
+    def __init__(self, ttl, max_stale=86400, wait_timeout=30):
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._value = None
+        self._fetched_at = None
+        self._flight = None
+
+    def _age(self):
+        return time.monotonic() - self._fetched_at
+
+    def get(self, loader):
+        # Returns (value, age_seconds, status) with status HIT, MISS or STALE.
+        with self._lock:
+            if self._fetched_at is not None and self._age() < self.ttl:
+                return self._value, self._age(), "HIT"
+            flight = self._flight
+            leader = flight is None
+            if leader:
+                flight = self._flight = {"done": threading.Event(), "error": None}
+
+        if leader:
+            try:
+                value = loader()
+                with self._lock:
+                    self._value = value
+                    self._fetched_at = time.monotonic()
+            except Exception as e:
+                flight["error"] = e
+            finally:
+                with self._lock:
+                    self._flight = None
+                flight["done"].set()
+            error = flight["error"]
+        elif flight["done"].wait(self.wait_timeout):
+            error = flight["error"]
+        else:
+            # Only this waiter gives up; the flight itself may still succeed.
+            error = TimeoutError("Upstream fetch still in flight")
+
+        with self._lock:
+            if error is None:
+                return self._value, self._age(), "MISS"
+            if self._fetched_at is not None and self._age() < self.max_stale:
+                return self._value, self._age(), "STALE"
+        raise error
@@ -0,0 +1,197 @@
+import numpy as np
+from fast_json import to_float
+
+# Price history helpers for /api/stock/{ticker}: OHLCV resampling into
+# weekly/monthly bars and LTTB (Largest-Triangle-Three-Buckets) downsampling
+# so long ranges chart with a bounded number of points.
+
+INTERVALS = ("daily", "weekly", "monthly")
+
+VALUE_COLUMNS = [
+    "open_price", "high_price", "low_price", "close_price", "price_in_usd",
+    "change_pct", "volume", "value_traded", "value_traded_usd",
+]
+SUM_COLUMNS = ["volume", "value_traded", "value_traded_usd"]
+
+
+def period_keys(dates, interval):
+    if interval == "weekly":
+        # date.toordinal() is 1 on Monday 0001-01-01, so this groups Mon..Sun.
+        return np.array([(d.toordinal() - 1) // 7 for d in dates])
+    return np.array([d.year * 12 + d.month - 1 for d in dates])
+
+
+def resample(records, interval):
+    # records: ascending by trade_date. Each bar is labelled with the last
+    # trading date it contains; change_pct is measured against the previous
+    # bar's close (compounded from the daily changes for the first bar).
+    if interval == "daily" or not records:
+        return records
+
+    keys = period_keys([r["trade_date"] for r in records], interval)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    ends = np.r_[starts[1:], len(keys)] - 1
+
+    cols = {c: to_float([r[c] for r in records]) for c in VALUE_COLUMNS}
+
+    bars = {
+        "open_price": cols["open_price"][starts],
+        "high_price": np.fmax.reduceat(cols["high_price"], starts),
+        "low_price": np.fmin.reduceat(cols["low_price"], starts),
+        "close_price": cols["close_price"][ends],
+        "price_in_usd": cols["price_in_usd"][ends],
+    }
+    for c in SUM_COLUMNS:
+        present = np.add.reduceat(~np.isnan(cols[c]), starts)
+        bars[c] = np.where(present > 0, np.add.reduceat(np.nan_to_num(cols[c]), starts), np.nan)
+
+    close = bars["close_price"]
+    prev_close = np.r_[np.nan, close[:-1]]
+    compounded = np.multiply.reduceat(1 + np.nan_to_num(cols["change_pct"]) / 100, starts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change = np.where(np.isnan(prev_close), compounded - 1, close / prev_close - 1) * 100
+    bars["change_pct"] = np.round(change, 2)
+
+    out = []
+    for i, end in enumerate(ends):
+        last = records[end]
+        bar = {k: v for k, v in last.items() if k not in VALUE_COLUMNS}
+        bar.update({c: float(bars[c][i]) for c in VALUE_COLUMNS})
+        out.append(bar)
+    return out
+
+
+def lttb_indices(y, threshold):
+    # Indices of the points LTTB keeps: always the first and last, plus one
+    # point per bucket chosen to maximise the triangle area with the
+    # previously kept point and the next bucket's average.
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(y)
+    if not valid.any():
+        return np.linspace(0, n - 1, threshold).astype(int)
+    if not valid.all():
+        y = np.interp(x, x[valid], y[valid])
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    keep = np.empty(threshold, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nxt = slice(edges[i + 1], edges[i + 2])
+            avg_x, avg_y = x[nxt].mean(), y[nxt].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[lo:hi] - y[a])
+            - (x[a] - x[lo:hi]) * (avg_y - y[a])
+        )
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+
+    return keep
+
+
+def downsample(records, max_points):
+    if not max_points or len(records) <= max_points:
+        return records
+    usd = to_float([r["price_in_usd"] for r in records])
+    close = to_float([r["close_price"] for r in records])
+    prices = np.where(np.isnan(usd), close, usd)
+    return [records[i] for i in lttb_indices(prices, max_points)]
+
+
+RETURN_HORIZONS = {"1W": 7, "1M": 30, "3M": 91, "1Y": 365}
+MOVING_AVERAGES = (20, 50, 200)
+TRADING_DAYS = 252
+
+
+def _round(value, digits=4):
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
+
+
+def _day(d):
+    return d.astype("datetime64[D]").item().isoformat()
+
+
+def history_arrays(records):
+    # (dates, close, high, low) columns from ascending /api/stock records
+    return (
+        np.array([r["trade_date"] for r in records], dtype="datetime64[D]"),
+        *(to_float([r[c] for r in records]) for c in ("close_price", "high_price", "low_price")),
+    )
+
+
+def analytics(dates, close, high=None, low=None):
+    # dates: datetime64[D] ascending; close/high/low: float arrays (NaN where
+    # missing). Everything is computed from whole-array NumPy operations.
+    valid = ~np.isnan(close)
+    dates, close = dates[valid], close[valid]
+    if len(close) == 0:
+        return None
+    high = close if high is None else np.where(np.isnan(high[valid]), close, high[valid])
+    low = close if low is None else np.where(np.isnan(low[valid]), close, low[valid])
+
+    last_date, last = dates[-1], close[-1]
+
+    def change_since(base_date):
+        pos = np.searchsorted(dates, base_date, side="right") - 1
+        return _round((last / close[pos] - 1) * 100, 2) if pos >= 0 else None
+
+    returns = {
+        label: change_since(last_date - np.timedelta64(days, "D"))
+        for label, days in RETURN_HORIZONS.items()
+    }
+    year_start = last_date.astype("datetime64[Y]").astype("datetime64[D]")
+    returns["YTD"] = change_since(year_start - np.timedelta64(1, "D"))
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_returns = np.diff(np.log(close))
+    recent = log_returns[-TRADING_DAYS:]
+    recent = recent[np.isfinite(recent)]
+    volatility = recent.std(ddof=1) * np.sqrt(TRADING_DAYS) * 100 if len(recent) > 1 else np.nan
+
+    peaks = np.maximum.accumulate(close)
+    drawdowns = close / peaks - 1
+    trough = int(np.argmin(drawdowns))
+    peak = int(np.argmax(close[:trough + 1]))
+
+    sums = np.r_[0.0, np.cumsum(close)]
+    moving_averages = {
+        f"ma_{n}": _round((sums[-1] - sums[-1 - n]) / n) if len(close) >= n else None
+        for n in MOVING_AVERAGES
+    }
+
+    year = dates > last_date - np.timedelta64(365, "D")
+    year_high, year_low = high[year], low[year]
+    hi, lo = int(np.argmax(year_high)), int(np.argmin(year_low))
+    year_dates = dates[year]
+
+    return {
+        "as_of": _day(last_date),
+        "last_close": _round(last),
+        "returns_pct": returns,
+        "volatility_annualized_pct": _round(volatility, 2),
+        "drawdown": {
+            "current_pct": _round(drawdowns[-1] * 100, 2),
+            "max_pct": _round(drawdowns[trough] * 100, 2),
+            "max_peak_date": _day(dates[peak]),
+            "max_trough_date": _day(dates[trough]),
+        },
+        "moving_averages": moving_averages,
+        "week52": {
+            "high": _round(year_high[hi]),
+            "high_date": _day(year_dates[hi]),
+            "low": _round(year_low[lo]),
+            "low_date": _day(year_dates[lo]),
+        },
+    }
@@ -0,0 +1,184 @@
+import os
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+from fx_store import apply_usd_conversion
+from market_partitions import add_future_partitions
+
+# Staging table -> market_data_daily, moving only what changed since the last
+# run. Each staging table has a per-exchange high-water mark in sync_watermarks:
+# updated_at when the staging table has that column, otherwise trade_date
+# (the last synced session is re-read because the loaders keep upserting it).
+SYNC_SOURCES = {
+    "ngx_daily": {
+        "exchange_id": 3,
+        "currency": "NGN",
+        "columns": [
+            ("ticker", "ticker"),
+            ("company_name", "ticker"),
+            ("trade_date", "trade_date"),
+            ("open_price", "open_price"),
+            ("high_price", "high_price"),
+            ("low_price", "low_price"),
+            ("close_price", "close_price"),
+            ("volume", "volume"),
+            ("value_traded", "value_traded"),
+            ("trades", "trades"),
+            ("change_pct", "change_pct"),
+        ],
+    },
+    "brvm_daily": {
+        "exchange_id": 2,
+        "currency": "XOF",
+        "columns": [
+            ("ticker", "ticker"),
+            ("company_name", "name"),
+            ("trade_date", "trade_date"),
+            ("open_price", "open_price"),
+            ("close_price", "close_price"),
+            ("volume", "volume"),
+            ("prev_close", "prev_close"),
+            ("value_traded", "close_price * volume"),
+            ("change_pct", "change_pct"),
+        ],
+    },
+}
+
+
+def ensure_watermark_table(engine):
+    with engine.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS sync_watermarks (
+                exchange_id INT NOT NULL PRIMARY KEY,
+                source_table VARCHAR(64) NOT NULL,
+                last_trade_date DATE NULL,
+                last_updated_at DATETIME NULL,
+                rows_synced INT NOT NULL DEFAULT 0,
+                synced_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    ON UPDATE CURRENT_TIMESTAMP
+            );
+        """))
+
+
+def _has_updated_at(conn, table):
+    return bool(conn.execute(text("""
+        SELECT COUNT(*)
+        FROM information_schema.columns
+        WHERE table_schema = DATABASE()
+        AND table_name = :table
+        AND column_name = 'updated_at';
+    """), {"table": table}).scalar())
+
+
+def delta_bounds_query(source_table, delta, use_updated_at):
+    return text(f"""
+        SELECT
+            COUNT(*) AS row_count,
+            MIN(trade_date) AS first_date,
+            MAX(trade_date) AS last_date
+            {", MAX(updated_at) AS last_updated_at" if use_updated_at else ""}
+        FROM {source_table}
+        WHERE {delta};
+    """)
+
+
+def sync_staging(engine, source_table, full=False, since=None):
+    # since: earliest trade_date the caller knows it rewrote, for staging tables
+    # without updated_at where a correction may land behind the watermark.
+    spec = SYNC_SOURCES[source_table]
+    exchange_id = spec["exchange_id"]
+    ensure_watermark_table(engine)
+    add_future_partitions(engine)
+
+    with engine.begin() as conn:
+        mark = conn.execute(text("""
+            SELECT last_trade_date, last_updated_at
+            FROM sync_watermarks
+            WHERE exchange_id = :exchange_id;
+        """), {"exchange_id": exchange_id}).mappings().first()
+
+        use_updated_at = _has_updated_at(conn, source_table)
+
+        if full or mark is None:
+            delta = "1 = 1"
+            params = {}
+        elif use_updated_at and mark["last_updated_at"] is not None:
+            delta = "updated_at > :since"
+            params = {"since": mark["last_updated_at"]}
+        elif mark["last_trade_date"] is not None:
+            delta = "trade_date >= :since"
+            params = {"since": min(d for d in (since, mark["last_trade_date"]) if d is not None)}
+        else:
+            delta = "1 = 1"
+            params = {}
+
+        bounds = conn.execute(delta_bounds_query(source_table, delta, use_updated_at), params).mappings().first()
+
+        if not bounds["row_count"]:
+            return {"rows": 0, "first_date": None, "last_date": None, "converted": 0}
+
+        targets = [t for t, _ in spec["columns"]]
+        sources = [s for _, s in spec["columns"]]
+        # Columns filled from the ticker code (NGX company_name) are only a
+        # placeholder for new rows; an existing real value is never replaced.
+        updates = [
+            t for t, s in spec["columns"]
+            if t not in ("ticker", "trade_date") and s != "ticker"
+        ]
+
+        # USD columns are cleared on every moved row and recomputed below, so a
+        # corrected close price can never keep a stale conversion.
+        conn.execute(text(f"""
+            INSERT INTO market_data_daily (
+                exchange_id, {", ".join(targets)}, currency
+            )
+            SELECT
+                {exchange_id}, {", ".join(sources)}, '{spec["currency"]}'
+            FROM {source_table}
+            WHERE {delta}
+            ON DUPLICATE KEY UPDATE
+                {", ".join(f"{c} = VALUES({c})" for c in updates)},
+                price_in_usd = NULL,
+                value_traded_usd = NULL;
+        """), params)
+
+        previous = dict(mark) if mark is not None else {}
+        conn.execute(text("""
+            INSERT INTO sync_watermarks
+                (exchange_id, source_table, last_trade_date, last_updated_at, rows_synced)
+            VALUES
+                (:exchange_id, :source_table, :last_trade_date, :last_updated_at, :rows_synced)
+            ON DUPLICATE KEY UPDATE
+                source_table = VALUES(source_table),
+                last_trade_date = VALUES(last_trade_date),
+                last_updated_at = VALUES(last_updated_at),
+                rows_synced = VALUES(rows_synced);
+        """), {
+            "exchange_id": exchange_id,
+            "source_table": source_table,
+            "last_trade_date": max(
+                d for d in (bounds["last_date"], previous.get("last_trade_date")) if d is not None
+            ),
+            "last_updated_at": bounds.get("last_updated_at") or previous.get("last_updated_at"),
+            "rows_synced": bounds["row_count"],
+        })
+
+    converted = apply_usd_conversion(
+        engine,
+        spec["currency"],
+        start_date=bounds["first_date"],
+        exchange_id=exchange_id
+    )
+
+    return {
+        "rows": bounds["row_count"],
+        "first_date": bounds["first_date"],
+        "last_date": bounds["last_date"],
+        "converted": converted["rows"],
+    }
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    for table in SYNC_SOURCES:
+        print(table, sync_staging(engine, table))
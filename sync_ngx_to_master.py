@@ -1,46 +1,21 @@
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 from dotenv import load_dotenv
+from market_snapshot import refresh_market_latest_snapshot
+from ticker_store import update_ticker_store
+from response_cache import bump_data_version
+from sync_engine import sync_staging
 
 load_dotenv()
 
 engine = create_engine(os.getenv("DATABASE_URL"))
 
-query = """
-INSERT IGNORE INTO market_data_daily (
-    exchange_id,
-    ticker,
-    company_name,
-    trade_date,
-    open_price,
-    high_price,
-    low_price,
-    close_price,
-    volume,
-    value_traded,
-    trades,
-    change_pct,
-    currency
-)
-SELECT
-    3 AS exchange_id,
-    ticker,
-    ticker AS company_name,
-    trade_date,
-    open_price,
-    high_price,
-    low_price,
-    close_price,
-    volume,
-    value_traded,
-    trades,
-    change_pct,
-    'NGN' AS currency
-FROM ngx_daily;
-"""
+result = sync_staging(engine, "ngx_daily")
 
-with engine.begin() as conn:
-    result = conn.execute(text(query))
+refresh_market_latest_snapshot(engine, [3])
+if result["rows"]:
+    update_ticker_store(engine, 3, since=result["first_date"])
+bump_data_version(engine, "market", "stock")
 
 print("NGX synced into market_data_daily.")
-print("Rows affected:", result.rowcount)
+print("Rows affected:", result["rows"])
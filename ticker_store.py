@@ -0,0 +1,259 @@
+import os
+import json
+import itertools
+import threading
+from collections import OrderedDict
+import numpy as np
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+from fast_json import to_float
+
+# Local columnar copy of market_data_daily: one .npy file per ticker holding
+# a structured array sorted by trade_date (with each row's exchange and
+# currency, as a ticker code can be listed on more than one exchange), plus a
+# small .json with the company name per exchange. The API maps the files read-only and slices them
+# without touching MySQL; loaders rewrite the affected tickers after they
+# commit (write to a temp file, then rename, so readers never see a partial
+# file and keep their old mapping until they reopen).
+#
+#   python ticker_store.py   rebuild every ticker from market_data_daily
+
+STORE_DIR = os.getenv(
+    "TICKER_STORE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ticker_store")
+)
+
+# Each open mapping holds a file descriptor; the API keeps at most this many.
+MAX_OPEN = int(os.getenv("TICKER_STORE_MAX_OPEN", "256"))
+
+DTYPE = np.dtype([
+    ("trade_date", "datetime64[D]"),
+    ("exchange_id", "i4"),
+    ("currency", "U8"),
+    ("open_price", "f8"),
+    ("high_price", "f8"),
+    ("low_price", "f8"),
+    ("close_price", "f8"),
+    ("price_in_usd", "f8"),
+    ("change_pct", "f8"),
+    ("volume", "f8"),
+    ("value_traded", "f8"),
+    ("value_traded_usd", "f8"),
+])
+VALUE_FIELDS = DTYPE.names[3:]
+
+# Field order of /api/stock/{ticker} records
+RECORD_FIELDS = [
+    "exchange_id", "ticker", "company_name", "trade_date",
+    "open_price", "high_price", "low_price", "close_price", "price_in_usd",
+    "change_pct", "volume", "value_traded", "value_traded_usd", "currency",
+]
+
+
+def _paths(ticker, directory):
+    name = ticker.upper().replace("/", "_")
+    return os.path.join(directory, name + ".npy"), os.path.join(directory, name + ".json")
+
+
+def to_array(rows):
+    arr = np.empty(len(rows), dtype=DTYPE)
+    arr["trade_date"] = np.array([r["trade_date"] for r in rows], dtype="datetime64[D]")
+    arr["exchange_id"] = [r["exchange_id"] for r in rows]
+    arr["currency"] = [r["currency"] or "" for r in rows]
+    for field in VALUE_FIELDS:
+        arr[field] = to_float([r[field] for r in rows])
+    return arr
+
+
+def _row_keys(arr):
+    return arr["trade_date"].astype(np.int64) * 1000 + arr["exchange_id"]
+
+
+def merge(existing, new, exchange_id=None, since=None, currency=None):
+    # Rows inside the refreshed scope are replaced wholesale by `new`, so
+    # corrections and deletions in that window carry over too. Without an
+    # explicit exchange the scope is the exchanges `new` has rows for.
+    in_scope = np.ones(len(existing), dtype=bool)
+    if exchange_id is not None:
+        in_scope &= existing["exchange_id"] == exchange_id
+    else:
+        in_scope &= np.isin(existing["exchange_id"], np.unique(new["exchange_id"]))
+    if currency is not None:
+        in_scope &= existing["currency"] == currency
+    if since is not None:
+        in_scope &= existing["trade_date"] >= np.datetime64(since, "D")
+    kept = existing[~in_scope & ~np.isin(_row_keys(existing), _row_keys(new))]
+
+    combined = np.concatenate([kept, new])
+    return combined[np.lexsort((combined["exchange_id"], combined["trade_date"]))]
+
+
+def _replace(path, write):
+    tmp = path + ".tmp"
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def write_series(ticker, arr, meta, directory=STORE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    data_path, meta_path = _paths(ticker, directory)
+
+    def write_array(tmp):
+        out = np.lib.format.open_memmap(tmp, mode="w+", dtype=DTYPE, shape=arr.shape)
+        out[:] = arr
+        out.flush()
+        del out
+
+    def write_meta(tmp):
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+
+    _replace(meta_path, write_meta)
+    _replace(data_path, write_array)
+
+
+def load_series(ticker, directory=STORE_DIR):
+    # None when there is no usable file (missing, or written with an older DTYPE)
+    data_path, _ = _paths(ticker, directory)
+    if not os.path.exists(data_path):
+        return None
+    arr = np.load(data_path)
+    return arr if arr.dtype == DTYPE else None
+
+
+def load_meta(ticker, directory=STORE_DIR):
+    _, meta_path = _paths(ticker, directory)
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def company_names(rows, names=None):
+    names = dict(names or {})
+    for r in rows:
+        names[str(r["exchange_id"])] = r["company_name"]
+    return names
+
+
+def history_query(filters):
+    return text(f"""
+        SELECT exchange_id, ticker, company_name, currency, trade_date,
+               {", ".join(VALUE_FIELDS)}
+        FROM market_data_daily
+        {"WHERE " + " AND ".join(filters) if filters else ""}
+        ORDER BY ticker, trade_date;
+    """)
+
+
+def update_ticker_store(engine, exchange_id=None, since=None, currency=None, directory=STORE_DIR):
+    filters = []
+    params = {}
+    if exchange_id is not None:
+        filters.append("exchange_id = :exchange_id")
+        params["exchange_id"] = exchange_id
+    if since is not None:
+        filters.append("trade_date >= :since")
+        params["since"] = since
+    if currency is not None:
+        filters.append("currency = :currency")
+        params["currency"] = currency
+
+    written = 0
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True).execute(history_query(filters), params).mappings()
+        for ticker, group in itertools.groupby(result, key=lambda r: r["ticker"]):
+            rows = list(group)
+            existing = load_series(ticker, directory)
+            if existing is None and filters:
+                # No usable file yet: writing just the refreshed window would
+                # leave the API serving a stub, so start from the full history.
+                with engine.connect() as history_conn:
+                    rows = history_conn.execute(history_query(["ticker = :ticker"]), {"ticker": ticker}).mappings().all()
+                arr = merge(np.empty(0, dtype=DTYPE), to_array(rows))
+                names = company_names(rows)
+            else:
+                if existing is None:
+                    existing = np.empty(0, dtype=DTYPE)
+                arr = merge(existing, to_array(rows), exchange_id, since, currency)
+                names = company_names(rows, load_meta(ticker, directory).get("company_names"))
+            write_series(ticker, arr, {"ticker": ticker, "company_names": names}, directory)
+            written += 1
+    return written
+
+
+class TickerStore:
+    # Read side used by the API. Mappings are reopened only when a loader
+    # has replaced the file (inode or mtime changed), and only the max_open
+    # most recently used ones stay open.
+
+    def __init__(self, directory=STORE_DIR, max_open=MAX_OPEN):
+        self.directory = directory
+        self.max_open = max_open
+        self._lock = threading.Lock()
+        self._open = OrderedDict()
+
+    def series(self, ticker):
+        data_path, meta_path = _paths(ticker, self.directory)
+        try:
+            st = os.stat(data_path)
+        except FileNotFoundError:
+            return None
+        version = (st.st_ino, st.st_mtime_ns)
+
+        with self._lock:
+            cached = self._open.get(ticker)
+            if cached is not None and cached[0] == version:
+                self._open.move_to_end(ticker)
+                return cached[1], cached[2]
+
+        arr = np.load(data_path, mmap_mode="r")
+        if arr.dtype != DTYPE:
+            # Written by an older version; MySQL serves it until a rebuild.
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+
+        with self._lock:
+            self._open[ticker] = (version, arr, meta)
+            self._open.move_to_end(ticker)
+            # Dropping the last reference closes the mapping and its fd.
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+        return arr, meta
+
+    def window(self, ticker, start=None, end=None, limit=None):
+        # Zero-copy slice of one ticker's history, ascending by trade_date.
+        found = self.series(ticker)
+        if found is None:
+            return None
+        arr, meta = found
+
+        dates = arr["trade_date"]
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(start, "D"), side="left"))
+        hi = len(arr) if end is None else int(np.searchsorted(dates, np.datetime64(end, "D"), side="right"))
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return arr[lo:hi], meta
+
+    def records(self, ticker, start=None, end=None, limit=None):
+        found = self.window(ticker, start, end, limit)
+        if found is None:
+            return None
+        arr, meta = found
+
+        columns = {field: arr[field].tolist() for field in DTYPE.names}
+        columns["volume"] = [None if v != v else int(v) for v in columns["volume"]]
+        columns["currency"] = [c or None for c in columns["currency"]]
+        names = meta["company_names"]
+        columns["company_name"] = [names.get(str(e)) for e in columns["exchange_id"]]
+        columns["ticker"] = [meta["ticker"]] * len(arr)
+
+        return [dict(zip(RECORD_FIELDS, row)) for row in zip(*(columns[f] for f in RECORD_FIELDS))]
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    print("Tickers written:", update_ticker_store(engine))
@@ -1,49 +1,31 @@
 import os
-import yfinance as yf
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine
 from dotenv import load_dotenv
+from fx_store import update_fx_history, apply_usd_conversion
+from market_snapshot import refresh_market_latest_snapshot
+from ticker_store import update_ticker_store
+from response_cache import bump_data_version
 
 load_dotenv()
 engine = create_engine(os.getenv("DATABASE_URL"))
 
-def get_rate(pair, fallback):
-    try:
-        rate = yf.Ticker(pair).fast_info["last_price"]
-        return float(rate) if rate else fallback
-    except Exception:
-        return fallback
+# Bring the dated FX table up to date before converting anything
+try:
+    update_fx_history(engine, ["XOF", "NGN"])
+except Exception as e:
+    print(f"FX history update failed, converting with stored rates: {e}")
 
-usd_xof = get_rate("USDXOF=X", 557.70)
-usd_ngn = get_rate("USDNGN=X", 1500.00)
+updated = {}
+for currency in ["USD", "XOF", "NGN"]:
+    updated[currency] = apply_usd_conversion(engine, currency)
 
-with engine.begin() as conn:
-    # USD stocks
-    conn.execute(text("""
-        UPDATE market_data_daily
-        SET used_ex_rate = 1,
-            price_in_usd = close_price,
-            value_traded_usd = value_traded
-        WHERE currency = 'USD';
-    """))
-
-    # BRVM XOF stocks
-    conn.execute(text("""
-        UPDATE market_data_daily
-        SET used_ex_rate = :usd_xof,
-            price_in_usd = close_price / :usd_xof,
-            value_traded_usd = value_traded / :usd_xof
-        WHERE currency = 'XOF';
-    """), {"usd_xof": usd_xof})
-
-    # NGX NGN stocks
-    conn.execute(text("""
-        UPDATE market_data_daily
-        SET used_ex_rate = :usd_ngn,
-            price_in_usd = close_price / :usd_ngn,
-            value_traded_usd = value_traded / :usd_ngn
-        WHERE currency = 'NGN';
-    """), {"usd_ngn": usd_ngn})
+refresh_market_latest_snapshot(engine)
+# Only tickers in a converted currency, from the earliest rewritten session on
+for currency, result in updated.items():
+    if result["rows"]:
+        update_ticker_store(engine, since=result["first_date"], currency=currency)
+bump_data_version(engine, "market", "stock")
 
 print("Currency conversion updated.")
-print("USD/XOF:", usd_xof)
-print("USD/NGN:", usd_ngn)
+for currency, result in updated.items():
+    print(f"{currency} rows converted:", result["rows"])
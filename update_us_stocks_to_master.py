@@ -1,10 +1,20 @@
 import os
 import time
-import numpy as np
+import bisect
+import threading
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import pandas as pd
 import yfinance as yf
-from sqlalchemy import create_engine, text
+from pandas.tseries.holiday import AbstractHolidayCalendar, USFederalHolidayCalendar, GoodFriday, Holiday
+from pandas.tseries.offsets import CustomBusinessDay
+from sqlalchemy import bindparam, create_engine, text
 from dotenv import load_dotenv
+from bulk_ingest import bulk_write
+from market_snapshot import refresh_market_latest_snapshot
+from ticker_store import update_ticker_store
+from market_partitions import add_future_partitions
+from response_cache import bump_data_version
 
 load_dotenv()
 engine = create_engine(os.getenv("DATABASE_URL"))
@@ -21,70 +31,324 @@ with engine.begin() as conn:
 tickers_df["ticker"] = tickers_df["ticker"].astype(str).str.strip()
 tickers = tickers_df["ticker"].dropna().unique()
 
-rows = []
+BATCH_SIZE = int(os.getenv("US_BATCH_SIZE", "100"))
+MAX_WORKERS = int(os.getenv("US_MAX_WORKERS", "4"))
+MAX_RETRIES = 5
+BACKFILL_YEARS = int(os.getenv("US_BACKFILL_YEARS", "5"))
 
-for ticker in tickers:
+names = dict(zip(tickers_df["ticker"], tickers_df["name"]))
+
+# Shared by all workers: once Yahoo throttles one batch, everyone backs off.
+backoff_lock = threading.Lock()
+backoff = {"until": 0.0, "delay": 2.0}
+
+
+def is_throttled(error):
+    message = f"{type(error).__name__} {error}".lower()
+    return "ratelimit" in message or "rate limit" in message or "too many requests" in message
+
+
+def wait_for_backoff():
+    with backoff_lock:
+        pause = backoff["until"] - time.monotonic()
+    if pause > 0:
+        time.sleep(pause)
+
+
+def returned_nothing(data):
+    if data.empty:
+        return True
+    if isinstance(data.columns, pd.MultiIndex):
+        close = data.xs("Close", axis=1, level=-1)
+    else:
+        close = data[["Close"]]
+    return bool(close.isna().all().all())
+
+
+def probe_throttle(ticker, **range_kwargs):
+    # yf.download keeps per-ticker errors in its own context and never
+    # raises them, so a throttled batch just comes back empty. Ticker.history
+    # does raise YFRateLimitError; ask it for one ticker to tell the two apart.
     try:
-        stock = yf.Ticker(ticker)
-        hist = stock.history(period="5d")
+        yf.Ticker(ticker).history(interval="1d", auto_adjust=True, **range_kwargs)
+    except Exception as e:
+        if is_throttled(e):
+            raise
 
-        if hist.empty:
-            continue
 
-        hist = hist.reset_index()
-        hist["Date"] = pd.to_datetime(hist["Date"]).dt.date
-        hist["Prev_Close"] = hist["Close"].shift(1)
-        hist["Change_pct"] = hist["Close"].pct_change() * 100
-
-        company_name = tickers_df.loc[tickers_df["ticker"] == ticker, "name"].iloc[0]
-
-        for _, row in hist.iterrows():
-            close_price = float(row["Close"])
-            volume = int(row["Volume"]) if not pd.isna(row["Volume"]) else None
-            value_traded = close_price * volume if volume is not None else None
-
-            rows.append({
-                "exchange_id": 1,
-                "ticker": ticker,
-                "company_name": company_name,
-                "trade_date": row["Date"],
-                "open_price": float(row["Open"]),
-                "high_price": float(row["High"]),
-                "low_price": float(row["Low"]),
-                "close_price": close_price,
-                "prev_close": None if pd.isna(row["Prev_Close"]) else float(row["Prev_Close"]),
-                "change_pct": 0 if pd.isna(row["Change_pct"]) else round(float(row["Change_pct"]), 2),
-                "volume": volume,
-                "value_traded": value_traded,
-                "value_traded_usd": value_traded,
-                "currency": "USD",
-                "used_ex_rate": 1,
-                "price_in_usd": close_price
-            })
-
-        print(f"Loaded {ticker}")
-        time.sleep(0.2)
+def download_batch(batch, **range_kwargs):
+    for attempt in range(MAX_RETRIES):
+        wait_for_backoff()
+        try:
+            data = yf.download(
+                batch,
+                interval="1d",
+                group_by="ticker",
+                auto_adjust=True,
+                progress=False,
+                threads=False,
+                **range_kwargs
+            )
+            if returned_nothing(data):
+                probe_throttle(batch[0], **range_kwargs)
+
+            with backoff_lock:
+                backoff["delay"] = max(2.0, backoff["delay"] / 2)
+            return data
+        except Exception as e:
+            if not is_throttled(e) or attempt == MAX_RETRIES - 1:
+                raise
+            with backoff_lock:
+                backoff["until"] = time.monotonic() + backoff["delay"]
+                backoff["delay"] = min(backoff["delay"] * 2, 120.0)
+            print(f"Throttled by Yahoo, backing off (batch of {len(batch)})")
+
 
+def history_rows(ticker, hist):
+    hist = hist.dropna(subset=["Close"])
+    if hist.empty:
+        return None
+
+    close = hist["Close"].astype(float)
+    volume = hist["Volume"].astype(float)
+    prev_close = close.shift(1)
+    change_pct = (close.pct_change() * 100).round(2).fillna(0)
+    value_traded = close * volume
+
+    return pd.DataFrame({
+        "exchange_id": 1,
+        "ticker": ticker,
+        "company_name": names.get(ticker),
+        "trade_date": pd.to_datetime(hist.index).date,
+        "open_price": hist["Open"].astype(float).values,
+        "high_price": hist["High"].astype(float).values,
+        "low_price": hist["Low"].astype(float).values,
+        "close_price": close.values,
+        "prev_close": prev_close.values,
+        "change_pct": change_pct.values,
+        "volume": volume.round().astype("Int64").values,
+        "value_traded": value_traded.values,
+        "value_traded_usd": value_traded.values,
+        "currency": "USD",
+        "used_ex_rate": 1,
+        "price_in_usd": close.values
+    })
+
+
+def fetch_batch(batch, **range_kwargs):
+    # A failing batch is split in half until the bad ticker is isolated, so
+    # one delisted symbol never costs the rest of its batch.
+    try:
+        data = download_batch(batch, **range_kwargs)
     except Exception as e:
-        print(f"Skipped {ticker}: {e}")
+        if len(batch) == 1:
+            print(f"Skipped {batch[0]}: {e}")
+            return [], batch
+        mid = len(batch) // 2
+        left, left_failed = fetch_batch(batch[:mid], **range_kwargs)
+        right, right_failed = fetch_batch(batch[mid:], **range_kwargs)
+        return left + right, left_failed + right_failed
+
+    if not data.empty and not isinstance(data.columns, pd.MultiIndex):
+        data.columns = pd.MultiIndex.from_product([batch, data.columns])
+
+    frames, failed = [], []
+    for ticker in batch:
+        if data.empty or ticker not in data.columns.get_level_values(0):
+            failed.append(ticker)
+            continue
+        frame = history_rows(ticker, data[ticker])
+        if frame is None:
+            failed.append(ticker)
+        else:
+            frames.append(frame)
+    return frames, failed
+
+
+def fetch_all(tickers, **range_kwargs):
+    batches = [list(tickers[i:i + BATCH_SIZE]) for i in range(0, len(tickers), BATCH_SIZE)]
+    frames, failed = [], []
+
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = [pool.submit(fetch_batch, batch, **range_kwargs) for batch in batches]
+        for future in as_completed(futures):
+            batch_frames, batch_failed = future.result()
+            frames.extend(batch_frames)
+            failed.extend(batch_failed)
+
+    return frames, failed
+
 
+# Unscheduled full-day NYSE closures (national days of mourning, storms)
+SPECIAL_CLOSURES = [
+    date(2001, 9, 11), date(2001, 9, 12), date(2001, 9, 13), date(2001, 9, 14),
+    date(2004, 6, 11), date(2007, 1, 2), date(2012, 10, 29), date(2012, 10, 30),
+    date(2018, 12, 5), date(2025, 1, 9),
+]
+
+
+class USTradingCalendar(AbstractHolidayCalendar):
+    # Federal holidays the exchanges keep open on are dropped, Good Friday and
+    # the special closures added.
+    rules = [
+        r for r in USFederalHolidayCalendar.rules
+        if r.name not in ("Columbus Day", "Veterans Day")
+    ] + [GoodFriday] + [
+        Holiday(f"Closed {d}", year=d.year, month=d.month, day=d.day)
+        for d in SPECIAL_CLOSURES
+    ]
+
+
+def trading_days(start, end, seen=()):
+    days = pd.bdate_range(
+        start, end, freq=CustomBusinessDay(calendar=USTradingCalendar())
+    ).date
+    return sorted(set(days) | {d for d in seen if start <= d <= end})
+
+
+today = date.today()
+backfill_start = (pd.Timestamp(today) - pd.DateOffset(years=BACKFILL_YEARS)).date()
+
+# Trading days Yahoo had nothing for on a previous gap refetch; they are not
+# counted as gaps again.
 with engine.begin() as conn:
-    for row in rows:
+    conn.execute(text("""
+        CREATE TABLE IF NOT EXISTS us_unfillable_days (
+            ticker VARCHAR(32) NOT NULL,
+            trade_date DATE NOT NULL,
+            recorded_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (ticker, trade_date)
+        );
+    """))
+
+# One grouped pass over what is already stored for every US ticker
+with engine.connect() as conn:
+    stored = {
+        r["ticker"]: r
+        for r in conn.execute(text("""
+            SELECT ticker, MIN(trade_date) AS first_date, MAX(trade_date) AS last_date, COUNT(*) AS days
+            FROM market_data_daily
+            WHERE exchange_id = 1
+            GROUP BY ticker;
+        """)).mappings().all()
+    }
+    seen_days = {
+        r[0] for r in conn.execute(text("""
+            SELECT DISTINCT trade_date
+            FROM market_data_daily
+            WHERE exchange_id = 1;
+        """)).all()
+    }
+    unfillable = {}
+    for r in conn.execute(text("SELECT ticker, trade_date FROM us_unfillable_days;")).all():
+        unfillable.setdefault(r[0], set()).add(r[1])
+
+calendar_start = min([backfill_start] + [r["first_date"] for r in stored.values()])
+calendar = trading_days(calendar_start, today, seen_days)
+
+
+def expected_days(first, last):
+    return bisect.bisect_right(calendar, last) - bisect.bisect_left(calendar, first)
+
+
+gap_tickers = [
+    t for t in tickers
+    if t in stored
+    and stored[t]["days"] + len(unfillable.get(t, ()))
+    < expected_days(stored[t]["first_date"], stored[t]["last_date"])
+]
+
+gaps = {}
+if gap_tickers:
+    with engine.connect() as conn:
+        have = {}
+        for r in conn.execute(text("""
+            SELECT ticker, trade_date
+            FROM market_data_daily
+            WHERE exchange_id = 1
+            AND ticker IN :tickers;
+        """).bindparams(bindparam("tickers", expanding=True)), {"tickers": gap_tickers}).all():
+            have.setdefault(r[0], set()).add(r[1])
+
+    for t in gap_tickers:
+        missing = [
+            d for d in calendar
+            if stored[t]["first_date"] <= d <= stored[t]["last_date"]
+            and d not in have.get(t, ()) and d not in unfillable.get(t, ())
+        ]
+        if missing:
+            gaps[t] = missing
+
+# Each ticker asks only for its missing range. Ranges start on the last day
+# already stored so the first new row still gets a real prev_close; that
+# stored row is skipped again by INSERT IGNORE.
+plan = {}
+for t in tickers:
+    if t not in stored:
+        start = backfill_start
+    elif t in gaps:
+        pos = bisect.bisect_left(calendar, gaps[t][0])
+        start = calendar[pos - 1] if pos else gaps[t][0]
+    else:
+        start = stored[t]["last_date"]
+        if start >= today:
+            continue
+    plan.setdefault(start, []).append(t)
+
+print(f"{len(tickers) - sum(len(v) for v in plan.values())} tickers up to date, "
+      f"{sum(1 for t in tickers if t not in stored)} new, {len(gaps)} with gaps")
+for t, missing in sorted(gaps.items(), key=lambda kv: -len(kv[1]))[:50]:
+    print(f"Gap {t}: {len(missing)} missing trading days, first {missing[0]}, last {missing[-1]}")
+
+started = time.monotonic()
+frames, failed = [], []
+for start, group in sorted(plan.items()):
+    group_frames, group_failed = fetch_all(group, start=start, end=today + timedelta(days=1))
+    frames.extend(group_frames)
+    failed.extend(group_failed)
+rows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+print(f"Fetched {len(frames)} tickers in {time.monotonic() - started:.1f}s, {len(failed)} without data")
+if failed:
+    print("No data:", ", ".join(sorted(failed)))
+
+add_future_partitions(engine)
+
+with engine.begin() as conn:
+    bulk_write(
+        conn,
+        rows,
+        "market_data_daily",
+        columns=[
+            "exchange_id", "ticker", "company_name", "trade_date",
+            "open_price", "high_price", "low_price", "close_price",
+            "prev_close", "change_pct", "volume",
+            "value_traded", "value_traded_usd",
+            "currency", "used_ex_rate", "price_in_usd"
+        ],
+        mode="ignore",
+        use_load_data=os.getenv("BULK_LOAD_DATA") == "1"
+    )
+
+# Gap days a successful refetch still did not return are recorded so they
+# are not asked for again on every run.
+fetched = rows.groupby("ticker")["trade_date"].agg(set).to_dict() if not rows.empty else {}
+unfilled = [
+    {"ticker": t, "trade_date": d}
+    for t, missing in gaps.items() if t in fetched
+    for d in missing if d not in fetched[t]
+]
+if unfilled:
+    with engine.begin() as conn:
         conn.execute(text("""
-            INSERT IGNORE INTO market_data_daily (
-                exchange_id, ticker, company_name, trade_date,
-                open_price, high_price, low_price, close_price,
-                prev_close, change_pct, volume,
-                value_traded, value_traded_usd,
-                currency, used_ex_rate, price_in_usd
-            )
-            VALUES (
-                :exchange_id, :ticker, :company_name, :trade_date,
-                :open_price, :high_price, :low_price, :close_price,
-                :prev_close, :change_pct, :volume,
-                :value_traded, :value_traded_usd,
-                :currency, :used_ex_rate, :price_in_usd
-            )
-        """), row)
+            INSERT IGNORE INTO us_unfillable_days (ticker, trade_date)
+            VALUES (:ticker, :trade_date);
+        """), unfilled)
+    print(f"Recorded {len(unfilled)} gap days Yahoo has no data for")
+
+refresh_market_latest_snapshot(engine, [1])
+if not rows.empty:
+    update_ticker_store(engine, 1, since=rows["trade_date"].min())
+bump_data_version(engine, "market", "stock")
 
 print(f"US stock data synced into market_data_daily. Rows prepared: {len(rows)}")